@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
 
+from simple_linear_regression import fit, predict
+
 # Given data
 square_footage = np.array([650, 785, 1200, 1400, 1540, 1650, 1725, 1850, 2100, 2300])
 housing_price = np.array([772000, 998000, 1208500, 1412000, 1534500, 1650250, 1725000, 1857500, 2120000, 2305000])
@@ -9,17 +11,28 @@ housing_price = np.array([772000, 998000, 1208500, 1412000, 1534500, 1650250, 17
 
 # Predict function
 def predict_price(x, w, b):
-    # Preallocate an array of zeros with the same shape as x
-    predicted_prices = np.zeros_like(x)
-
-    # Loop through each index and value in x
-    for i, value in enumerate(x):
-        # Compute the predicted price for the current value of x using the linear equation
-        predicted_prices[i] = w * value + b
+    # # Slow
+    # # Preallocate an array of zeros with the same shape as x
+    # # (zeros_like keeps the dtype of x, so an integer x silently truncates the predictions)
+    # predicted_prices = np.zeros_like(x)
+    #
+    # # Loop through each index and value in x
+    # for i, value in enumerate(x):
+    #     # Compute the predicted price for the current value of x using the linear equation
+    #     predicted_prices[i] = w * value + b
+
+    # Fast
+    # Compute all predicted prices at once in float64
+    predicted_prices = predict(x, w, b)
 
     return predicted_prices
 
 
+# Best fit for comparison with the values chosen on the sliders
+best_w, best_b = fit(square_footage, housing_price)
+print(f'Least squares fit: f(x) = {best_w:.2f}x + {best_b:.2f}')
+
+
 # Setting up the figure and axis
 fig, ax = plt.subplots(figsize=(10, 6))
 plt.subplots_adjust(bottom=0.25)
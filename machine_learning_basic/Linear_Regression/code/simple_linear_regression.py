@@ -0,0 +1,170 @@
+import warnings
+
+import numpy as np
+
+# Number of rows read from disk at a time by the streaming functions
+CHUNK_SIZE = 1 << 20
+
+
+# Predict function: f(x) = w * x + b for every x at once, always in float64
+def predict(x, w, b, out=None):
+    x = np.asarray(x, dtype=np.float64)
+    if out is None:
+        out = np.empty(x.shape, dtype=np.float64)
+    np.multiply(x, w, out=out)
+    np.add(out, b, out=out)
+    return out
+
+
+# Closed-form least squares fit of w and b (in memory)
+def fit(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.shape != y.shape or x.ndim != 1 or len(x) < 2:
+        raise ValueError("x and y must be 1D arrays of the same length with at least two values")
+
+    # Centering first keeps the sums small and the result accurate for large x
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    variance = np.dot(dx, dx)
+    if variance == 0:
+        raise ValueError("All x values are equal, the slope is undefined")
+
+    w = np.dot(dx, y - y_mean) / variance
+    b = y_mean - w * x_mean
+    return w, b
+
+
+# Mean squared error (halved, as in the cost function J(w, b) = 1 / (2m) * sum((f(x) - y) ** 2))
+def cost(x, y, w, b):
+    error = predict(x, w, b)
+    error -= y
+    return np.dot(error, error) / (2 * len(error))
+
+
+def iter_chunks(source, chunk_size=CHUNK_SIZE, x_column=0, y_column=1, skip_header=0):
+    # Yield (x, y) float64 chunks without loading the whole dataset into memory.
+    # source can be:
+    #   - a .npy file holding an (n, k) array, opened memory-mapped
+    #   - a tuple of two .npy files holding the x and y vectors, opened memory-mapped
+    #   - a .csv file, parsed chunk_size lines at a time
+    if isinstance(source, (tuple, list)):
+        x_data = np.load(source[0], mmap_mode='r')
+        y_data = np.load(source[1], mmap_mode='r')
+        if x_data.shape != y_data.shape:
+            raise ValueError("x and y files must have the same length")
+        for start in range(0, len(x_data), chunk_size):
+            yield (np.asarray(x_data[start:start + chunk_size], dtype=np.float64),
+                   np.asarray(y_data[start:start + chunk_size], dtype=np.float64))
+
+    elif str(source).endswith('.npy'):
+        data = np.load(source, mmap_mode='r')
+        if data.ndim != 2:
+            raise ValueError("A single .npy file must hold a 2D array with one row per sample")
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            yield (np.asarray(chunk[:, x_column], dtype=np.float64),
+                   np.asarray(chunk[:, y_column], dtype=np.float64))
+
+    elif str(source).endswith('.csv'):
+        with open(source) as file:
+            for _ in range(skip_header):
+                next(file)
+            while True:
+                # loadtxt warns when it reaches the end of the file, which is how the loop ends
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)
+                    chunk = np.loadtxt(file, delimiter=',', usecols=(x_column, y_column), max_rows=chunk_size,
+                                       dtype=np.float64, ndmin=2)
+                if len(chunk) == 0:
+                    break
+                yield chunk[:, 0], chunk[:, 1]
+
+    else:
+        raise ValueError("Source must be a .npy file, a .csv file or a tuple of two .npy files")
+
+
+def streaming_statistics(source, **chunk_options):
+    # One pass over the data: count, means and centered sums, merged chunk by chunk
+    # (pairwise update of Chan et al., so it stays accurate for hundreds of millions of rows)
+    n = 0
+    x_mean = y_mean = 0.0
+    sxx = sxy = syy = 0.0
+
+    for x, y in iter_chunks(source, **chunk_options):
+        m = len(x)
+        if m == 0:
+            continue
+        cx = x.mean()
+        cy = y.mean()
+        dx = x - cx
+        dy = y - cy
+
+        total = n + m
+        delta_x = cx - x_mean
+        delta_y = cy - y_mean
+        sxx += np.dot(dx, dx) + delta_x * delta_x * n * m / total
+        sxy += np.dot(dx, dy) + delta_x * delta_y * n * m / total
+        syy += np.dot(dy, dy) + delta_y * delta_y * n * m / total
+        x_mean += delta_x * m / total
+        y_mean += delta_y * m / total
+        n = total
+
+    return {'n': n, 'x_mean': x_mean, 'y_mean': y_mean, 'sxx': sxx, 'sxy': sxy, 'syy': syy}
+
+
+# Exact least squares fit in a single streaming pass
+def fit_streaming(source, **chunk_options):
+    stats = streaming_statistics(source, **chunk_options)
+    if stats['n'] < 2 or stats['sxx'] == 0:
+        raise ValueError("Need at least two distinct x values to fit a line")
+    w = stats['sxy'] / stats['sxx']
+    b = stats['y_mean'] - w * stats['x_mean']
+    return w, b
+
+
+def to_original_units(w, b, x_shift, x_scale, y_shift, y_scale):
+    # y = y_scale * (w * (x - x_shift) / x_scale + b) + y_shift
+    w_original = w * y_scale / x_scale
+    return w_original, y_shift + y_scale * b - w_original * x_shift
+
+
+# Mini-batch gradient descent over chunks read from disk
+def fit_gradient_descent(source, learning_rate=0.1, epochs=10, batch_size=1024, w=0.0, b=0.0, standardize=True,
+                         history=None, **chunk_options):
+    # Gradient descent on raw square footage and prices diverges for any usable learning rate,
+    # so by default x and y are standardized with statistics from one extra streaming pass
+    # and the learned parameters are converted back to the original units at the end.
+    if standardize:
+        stats = streaming_statistics(source, **chunk_options)
+        if stats['n'] < 2 or stats['sxx'] == 0:
+            raise ValueError("Need at least two distinct x values to fit a line")
+        x_shift, x_scale = stats['x_mean'], np.sqrt(stats['sxx'] / stats['n'])
+        y_shift, y_scale = stats['y_mean'], np.sqrt(stats['syy'] / stats['n']) or 1.0
+        # Express the initial parameters in standardized units
+        w, b = w * x_scale / y_scale, (w * x_shift + b - y_shift) / y_scale
+    else:
+        x_shift, x_scale, y_shift, y_scale = 0.0, 1.0, 0.0, 1.0
+
+    for epoch in range(epochs):
+        for x, y in iter_chunks(source, **chunk_options):
+            if standardize:
+                x = (x - x_shift) / x_scale
+                y = (y - y_shift) / y_scale
+
+            for start in range(0, len(x), batch_size):
+                xb = x[start:start + batch_size]
+                error = predict(xb, w, b)
+                error -= y[start:start + batch_size]
+
+                # Gradients of J(w, b) with respect to w and b
+                dj_dw = np.dot(error, xb) / len(xb)
+                dj_db = error.mean()
+                w -= learning_rate * dj_dw
+                b -= learning_rate * dj_db
+
+        if history is not None:
+            history.append(to_original_units(w, b, x_shift, x_scale, y_shift, y_scale))
+
+    return to_original_units(w, b, x_shift, x_scale, y_shift, y_scale)
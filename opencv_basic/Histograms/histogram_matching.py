@@ -1,3 +1,7 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 from skimage.exposure import match_histograms
@@ -29,18 +33,92 @@ def hist_match(source_img, template_img, multichannel):
 
         return matched_img
 
-# Load the source and template images
-source_img = cv2.imread('blue-moon.jpg')
-template_img = cv2.imread('purple-moon.jpg')
 
-# Match the histograms
-# matched_img = hist_match(source_img, template_img, True)
-matched_img = match_histograms(source_img, template_img, multichannel=True)
+def normalized_cdf(hist):
+    # Same normalization as hist_match: the cumulative histogram stretched to [0, 255]
+    cumulative_hist = hist.ravel().astype(np.float64).cumsum()
+    return (cumulative_hist - cumulative_hist.min()) * 255 / (cumulative_hist.max() - cumulative_hist.min())
+
+
+def channel_cdfs(img):
+    # One normalized CDF per channel, using cv2.calcHist (it releases the GIL, so batches can run on threads)
+    channels = 1 if img.ndim == 2 else img.shape[2]
+    return [normalized_cdf(cv2.calcHist([img], [channel], None, [256], [0, 256])) for channel in range(channels)]
+
+
+class HistogramMatcher:
+    # Matches any number of source images to one template, computing the template CDFs only once
+    def __init__(self, template_img):
+        if template_img.dtype != np.uint8:
+            raise ValueError("Template image must be uint8")
+        self.channels = 1 if template_img.ndim == 2 else template_img.shape[2]
+        self.template_cdfs = channel_cdfs(template_img)
+        self.levels = np.arange(256)
+
+    def lut(self, source_img):
+        # Build the 256-entry pixel map of every channel
+        if source_img.dtype != np.uint8:
+            raise ValueError("Source image must be uint8")
+        source_channels = 1 if source_img.ndim == 2 else source_img.shape[2]
+        if source_channels != self.channels:
+            raise ValueError("Source and template images must have the same number of channels")
+
+        pixel_maps = [np.round(np.interp(source_cdf, template_cdf, self.levels)).astype(np.uint8)
+                      for source_cdf, template_cdf in zip(channel_cdfs(source_img), self.template_cdfs)]
+
+        if self.channels == 1:
+            return pixel_maps[0]
+        # Shape (1, 256, channels) so cv2.LUT maps each channel with its own table
+        return np.dstack(pixel_maps)
+
+    def match(self, source_img, out=None):
+        # A single cv2.LUT call applies the maps of all channels
+        return cv2.LUT(source_img, self.lut(source_img), dst=out)
+
+    def match_batch(self, source_imgs, workers=None):
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            return list(executor.map(self.match, source_imgs))
+
+
+def benchmark(source_img, template_img, batch_size=32, repeats=3):
+    # Compare skimage, the per-channel hist_match and the cached HistogramMatcher on a batch of sources
+    batch = [source_img] * batch_size
+
+    def timed(name, func):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = func()
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{name:<32} {elapsed * 1000:9.2f} ms per batch of {batch_size}")
+        return result
+
+    timed('skimage match_histograms', lambda: [match_histograms(img, template_img, channel_axis=-1) for img in batch])
+    reference = timed('hist_match', lambda: [hist_match(img, template_img, True) for img in batch])
+    timed('HistogramMatcher (with setup)', lambda: HistogramMatcher(template_img).match_batch(batch, workers=1))
+
+    matcher = HistogramMatcher(template_img)
+    timed('HistogramMatcher.match', lambda: [matcher.match(img) for img in batch])
+    result = timed('HistogramMatcher.match_batch', lambda: matcher.match_batch(batch))
+    print(f"Same result as hist_match: {all(np.array_equal(a, b) for a, b in zip(result, reference))}")
+
+
+if __name__ == '__main__':
+    # Load the source and template images
+    source_img = cv2.imread('blue-moon.jpg')
+    template_img = cv2.imread('purple-moon.jpg')
+
+    # Match the histograms
+    # matched_img = hist_match(source_img, template_img, True)
+    # matched_img = match_histograms(source_img, template_img, channel_axis=-1)
+    matcher = HistogramMatcher(template_img)
+    matched_img = matcher.match(source_img)
 
+    # Compare the matcher with skimage on a batch of frames
+    benchmark(source_img, template_img)
 
-# Save the result
-cv2.imshow('matched', matched_img)
-cv2.imshow('source', source_img)
-cv2.imshow('template', template_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
\ No newline at end of file
+    # Save the result
+    cv2.imshow('matched', matched_img)
+    cv2.imshow('source', source_img)
+    cv2.imshow('template', template_img)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
@@ -2,15 +2,23 @@ import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 
+from joint_histogram import ImageHistograms
+
 # Load the image
 image_path = 'colorful.jpg'  # Replace with the path to your image
 image = cv2.imread(image_path)
 
-# Convert the image to grayscale
+# Convert the image to grayscale (only needed for display)
 gray_image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
+# Count the histograms below in one update: a coarse joint R, G, B histogram for the 2D and 3D histograms,
+# plus exact 256-bin histograms of every channel and of the grayscale image
+image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+image_hists = ImageHistograms(32).update(image)
+
 # Calculate the histogram for grayscale image
-hist_gray = cv2.calcHist([gray_image], [0], None, [256], [0, 256])
+# hist_gray = cv2.calcHist([gray_image], [0], None, [256], [0, 256])
+hist_gray = image_hists.gray_histogram()
 
 # Create a plot
 plt.figure(figsize=(10, 4))
@@ -28,7 +36,6 @@ plt.ylabel('Frequency')
 plt.title('Grayscale Image Histogram')
 plt.show()
 
-image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 # Create a plot
 plt.figure(figsize=(12, 4))
 
@@ -41,7 +48,8 @@ plt.subplot(1, 2, 2)
 # Calculate and plot the histogram for each channel
 colors = ('r', 'g', 'b')
 for i, color in enumerate(colors):
-    histogram = cv2.calcHist([image], [i], None, [256], [0, 256])
+    # histogram = cv2.calcHist([image], [i], None, [256], [0, 256])
+    histogram = image_hists.histogram((i,))
     plt.plot(histogram, color=color)
 
 plt.xlabel('Intensity')
@@ -55,11 +63,11 @@ plt.figure(figsize=(12, 4))
 
 hist_size = 32
 # Calculate the 2D histogram for color image
-channels = cv2.split(image)
 colors = ['R', 'G', 'B']
 for i, mixed_channels in enumerate([(0, 1), (1, 2), (0, 2)]):
     plt.subplot(1, 3, i + 1)
-    hist_2d = cv2.calcHist([channels[mixed_channels[0]], channels[mixed_channels[1]]], [0, 1], None, [hist_size, hist_size], [0, 256, 0, 256])
+    # hist_2d = cv2.calcHist([channels[mixed_channels[0]], channels[mixed_channels[1]]], [0, 1], None, [hist_size, hist_size], [0, 256, 0, 256])
+    hist_2d = image_hists.histogram(mixed_channels, hist_size)
     # Plot the 2D histogram for color image
     plt.imshow(hist_2d, interpolation='nearest', cmap='jet')
     plt.colorbar()
@@ -77,7 +85,8 @@ plt.figure()
 
 # Create a 3D histogram with 32 bins in each dimension (change as needed)
 hist_size = 8
-hist = cv2.calcHist([channels[0], channels[1], channels[2]], [0, 1, 2], None, [hist_size, hist_size, hist_size], [0, 256, 0, 256, 0, 256])
+# hist = cv2.calcHist([channels[0], channels[1], channels[2]], [0, 1, 2], None, [hist_size, hist_size, hist_size], [0, 256, 0, 256, 0, 256])
+hist = image_hists.histogram((0, 1, 2), hist_size)
 
 # Find the nonzero elements
 non_zero = np.where(hist > 0)
@@ -0,0 +1,145 @@
+import time
+
+import cv2
+import numpy as np
+
+# Images are counted in bands of at most this many pixels, so float32 calcHist counts stay exact
+BAND_PIXELS = 1 << 24
+
+# Largest resolution of the joint histogram (32 ** 3 cells); finer joint histograms cost more than they show
+MAX_JOINT_BINS = 32
+
+
+def merge_bins(hist, bins):
+    # Sum neighbouring bins along every axis down to the requested resolution
+    factor = hist.shape[0] // bins
+    if factor == 1:
+        return hist
+    shape = []
+    for _ in range(hist.ndim):
+        shape += [bins, factor]
+    return hist.reshape(shape).sum(axis=tuple(range(1, 2 * hist.ndim, 2)))
+
+
+class ImageHistograms:
+    # The 1D, 2D and 3D histograms of a 3-channel image, accumulated over frames in float64.
+    # The 2D and 3D histograms are marginals of a coarse joint histogram (at most MAX_JOINT_BINS per channel).
+    # The 256-bin histograms of every channel and of the grayscale image are counted separately: as marginals they
+    # would need a 256 ** 3 joint histogram, which is slower than counting them directly. An update is therefore
+    # a cvtColor and five calcHist calls per band, reading every pixel about five times, against eight calcHist
+    # calls and a cvtColor for the separate histograms of histograms.py.
+    # Channels keep the order of the image (index 0 is R for an RGB image, B for a BGR one); rgb tells how to
+    # convert the image for the grayscale histogram.
+    def __init__(self, bins=MAX_JOINT_BINS, rgb=True):
+        if bins < 1 or bins > MAX_JOINT_BINS or bins & (bins - 1):
+            raise ValueError(f"Number of bins must be a power of two between 1 and {MAX_JOINT_BINS}")
+        self.bins = bins
+        self.gray_code = cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY
+        self.counts = np.zeros(bins ** 3, dtype=np.float64)
+        self.channel_counts = np.zeros((3, 256), dtype=np.float64)
+        self.gray_counts = np.zeros(256, dtype=np.float64)
+        self.frames = 0
+
+    def reset(self):
+        self.counts.fill(0)
+        self.channel_counts.fill(0)
+        self.gray_counts.fill(0)
+        self.frames = 0
+
+    def update(self, image, mask=None, decay=None):
+        # Add an image (e.g. the next video frame) to the running histograms;
+        # with decay, older frames fade out as an exponential moving histogram
+        if image.ndim != 3 or image.shape[2] != 3 or image.dtype != np.uint8:
+            raise ValueError("Image must be a uint8 image with 3 channels")
+        if mask is not None and mask.shape != image.shape[:2]:
+            raise ValueError("Mask must have the same height and width as the image")
+
+        if decay is not None:
+            self.counts *= decay
+            self.channel_counts *= decay
+            self.gray_counts *= decay
+
+        band_rows = max(1, BAND_PIXELS // image.shape[1])
+        for top in range(0, image.shape[0], band_rows):
+            band = image[top:top + band_rows]
+            band_mask = None if mask is None else mask[top:top + band_rows].astype(np.uint8, copy=False)
+
+            self.counts += cv2.calcHist([band], [0, 1, 2], band_mask, [self.bins] * 3, [0, 256] * 3).ravel()
+            for c in range(3):
+                self.channel_counts[c] += cv2.calcHist([band], [c], band_mask, [256], [0, 256]).ravel()
+            gray = cv2.cvtColor(band, self.gray_code)
+            self.gray_counts += cv2.calcHist([gray], [0], band_mask, [256], [0, 256]).ravel()
+
+        self.frames += 1
+        return self
+
+    def joint(self):
+        return self.counts.reshape(self.bins, self.bins, self.bins)
+
+    def histogram(self, channels, bins=None):
+        # Histogram over the given channels, one axis per channel in the requested order.
+        # 1D histograms have up to 256 bins (256 by default); 2D and 3D ones are marginals of the joint histogram.
+        if len(set(channels)) != len(channels) or not set(channels) <= {0, 1, 2}:
+            raise ValueError("Channels must be distinct values among 0, 1 and 2")
+
+        if len(channels) == 1:
+            bins = bins or 256
+            if 256 % bins:
+                raise ValueError("Number of bins must divide 256")
+            return merge_bins(self.channel_counts[channels[0]], bins).astype(np.float32)
+
+        bins = bins or self.bins
+        if self.bins % bins:
+            raise ValueError(f"Number of bins must divide the joint resolution ({self.bins})")
+        other_axes = tuple(axis for axis in range(3) if axis not in channels)
+        hist = self.joint().sum(axis=other_axes) if other_axes else self.joint()
+        # Put the axes in the requested order
+        hist = np.transpose(hist, np.argsort(np.argsort(channels)))
+        return merge_bins(hist, bins).astype(np.float32)
+
+    def gray_histogram(self, bins=256):
+        # Histogram of the grayscale image
+        if 256 % bins:
+            raise ValueError("Number of bins must divide 256")
+        return merge_bins(self.gray_counts, bins).astype(np.float32)
+
+
+def benchmark(image, bins=32, repeats=5):
+    # Histograms of the histograms.py script: grayscale and three 1D (256 bins), three 2D and one 3D (8 bins)
+    pairs = [(0, 1), (1, 2), (0, 2)]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        channels = cv2.split(image)
+        cv2.calcHist([cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)], [0], None, [256], [0, 256])
+        for i in range(3):
+            cv2.calcHist([image], [i], None, [256], [0, 256])
+        for a, b in pairs:
+            cv2.calcHist([channels[a], channels[b]], [0, 1], None, [bins, bins], [0, 256, 0, 256])
+        reference = cv2.calcHist(channels, [0, 1, 2], None, [8, 8, 8], [0, 256, 0, 256, 0, 256])
+    calc_hist_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        engine = ImageHistograms(bins).update(image)
+        engine.gray_histogram()
+        for i in range(3):
+            engine.histogram((i,))
+        for pair in pairs:
+            engine.histogram(pair)
+        hist_3d = engine.histogram((0, 1, 2), 8)
+    engine_time = (time.perf_counter() - start) / repeats
+
+    print(f"calcHist x 8      {calc_hist_time * 1000:8.2f} ms")
+    print(f"ImageHistograms   {engine_time * 1000:8.2f} ms   same 3D histogram: {np.array_equal(hist_3d, reference)}")
+
+
+if __name__ == '__main__':
+    image = cv2.imread('colorful.jpg')
+    benchmark(image)
+
+    # Running histogram over a sequence of frames
+    engine = ImageHistograms(32)
+    for frame in [image, cv2.flip(image, 1), cv2.GaussianBlur(image, (5, 5), 0)]:
+        engine.update(frame, decay=0.9)
+    print(f"{engine.frames} frames, {engine.counts.sum():.0f} weighted pixels")
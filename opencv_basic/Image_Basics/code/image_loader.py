@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# The same extensions as opencv_basic/image_files.py; this directory is run on its own, so the list is kept here
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def list_images(source):
+    # A directory (its image files, sorted) or a list of paths
+    if isinstance(source, str) and os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+    if isinstance(source, str):
+        return [source]
+    return [str(path) for path in source]
+
+
+class Throughput:
+    # Images, pixels and time spent in one kind of work (decode or encode), updated from the worker threads
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.images = 0
+        self.pixels = 0
+        self.seconds = 0.0
+
+    def add(self, image, seconds):
+        with self.lock:
+            self.images += 1
+            self.pixels += image.shape[0] * image.shape[1]
+            self.seconds += seconds
+
+    def report(self, wall_seconds):
+        # seconds is the time summed over all workers; the rates are per wall-clock second
+        wall_seconds = max(wall_seconds, 1e-9)
+        return {'images': self.images, 'megapixels': self.pixels / 1e6, 'seconds': self.seconds,
+                'images_per_second': self.images / wall_seconds,
+                'megapixels_per_second': self.pixels / 1e6 / wall_seconds}
+
+
+class ImageLoader:
+    # Decodes images on a thread pool ahead of the consumer and encodes saved images behind it, so the caller's
+    # thread (cv2.imshow/waitKey, processing) doesn't wait on file I/O.
+    # Iterating yields (path, image) in order; at most read_ahead images are decoded but not yet consumed.
+    # save() queues a cv2.imwrite and returns at once; it blocks only when write_behind writes are pending.
+    # The image passed to save() is encoded later, so it must not be modified until close() (or pass copy=True).
+    def __init__(self, source, workers=None, read_ahead=8, write_behind=8, flags=cv2.IMREAD_COLOR):
+        self.paths = list_images(source)
+        self.flags = flags
+        self.read_ahead = read_ahead
+        self.executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count())
+        self.write_slots = threading.BoundedSemaphore(write_behind)
+        self.pending_writes = []
+        self.decode_stats = Throughput()
+        self.encode_stats = Throughput()
+        self.start_time = time.perf_counter()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def decode(self, path):
+        start = time.perf_counter()
+        image = cv2.imread(path, self.flags)
+        if image is None:
+            raise IOError(f"Could not read image: {path}")
+        self.decode_stats.add(image, time.perf_counter() - start)
+        return image
+
+    def __iter__(self):
+        pending = deque()
+        paths = iter(self.paths)
+        for path in paths:
+            pending.append((path, self.executor.submit(self.decode, path)))
+            if len(pending) == self.read_ahead:
+                break
+
+        while pending:
+            path, future = pending.popleft()
+            # Keep the read-ahead window full while the consumer works on this image
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append((next_path, self.executor.submit(self.decode, next_path)))
+            yield path, future.result()
+
+    def encode(self, path, image, params):
+        try:
+            start = time.perf_counter()
+            if not cv2.imwrite(path, image, params):
+                raise IOError(f"Could not write image: {path}")
+            self.encode_stats.add(image, time.perf_counter() - start)
+        finally:
+            self.write_slots.release()
+
+    def save(self, path, image, params=(), copy=False):
+        self.write_slots.acquire()
+        if copy:
+            image = image.copy()
+        self.pending_writes.append(self.executor.submit(self.encode, path, image, list(params)))
+        # Surface errors of finished writes early and drop them from the list
+        done = [future for future in self.pending_writes if future.done()]
+        self.pending_writes = [future for future in self.pending_writes if not future.done()]
+        for future in done:
+            future.result()
+
+    def close(self):
+        # Wait for the queued writes and raise the first error, if any
+        try:
+            for future in self.pending_writes:
+                future.result()
+        finally:
+            self.pending_writes = []
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def report(self):
+        wall_seconds = time.perf_counter() - self.start_time
+        return {'decode': self.decode_stats.report(wall_seconds), 'encode': self.encode_stats.report(wall_seconds)}
+
+    def print_report(self):
+        for name, stats in self.report().items():
+            print(f"{name}: {stats['images']} images, {stats['images_per_second']:.1f} images/s, "
+                  f"{stats['megapixels_per_second']:.1f} MP/s ({stats['seconds']:.3f} s in workers)")
+
+
+def benchmark(source, output_dir, workers=None):
+    # Decode and re-encode every image synchronously, then through the loader
+    paths = list_images(source)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    for path in paths:
+        cv2.imwrite(os.path.join(output_dir, os.path.basename(path)), cv2.imread(path))
+    sync_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ImageLoader(paths, workers=workers) as loader:
+        for path, image in loader:
+            loader.save(os.path.join(output_dir, os.path.basename(path)), image)
+    async_time = time.perf_counter() - start
+
+    print(f"{len(paths)} images: synchronous {sync_time:.3f} s   loader {async_time:.3f} s")
+    loader.print_report()
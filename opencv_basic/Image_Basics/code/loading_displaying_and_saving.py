@@ -1,18 +1,23 @@
 import cv2
 
+from image_loader import ImageLoader
+
 # Load the image using OpenCV
-img = cv2.imread("../img/HBD.jpg")
+# (the loader decodes on a background thread; for a directory it reads the next images ahead)
+with ImageLoader(["../img/HBD.jpg"]) as loader:
+    for path, img in loader:
+        # Get the image dimensions
+        height, width, channels = img.shape
 
-# Get the image dimensions
-height, width, channels = img.shape
+        # Display the image dimensions
+        print(f"Input image dimensions: {width} x {height} x {channels}")
 
-# Display the image dimensions
-print(f"Input image dimensions: {width} x {height} x {channels}")
+        # Displaying the image
+        cv2.imshow("Image", img)
+        cv2.waitKey(0)
 
-# Displaying the image
-cv2.imshow("Image", img)
-cv2.waitKey(0)
+        # Save the image to a new file (encoded in the background)
+        loader.save("output.jpg", img)
 
-# Save the image to a new file
-cv2.imwrite("output.jpg", img)
 print("Image saved as output.jpg")
+loader.print_report()
@@ -0,0 +1,148 @@
+import time
+
+import cv2
+import numpy as np
+
+from rotation import get_rotation_matrix
+
+# Translations closer than this to whole pixels take the slice-and-copy path
+INTEGER_TOLERANCE = 1e-6
+
+
+def to_homogeneous(matrix):
+    # 2x3 affine matrices become 3x3 so they can be chained with a matrix product
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape == (2, 3):
+        return np.vstack([matrix, [0.0, 0.0, 1.0]])
+    if matrix.shape != (3, 3):
+        raise ValueError("Expected a 2x3 or 3x3 matrix")
+    return matrix
+
+
+def shift_image(image, dx, dy, size=None, border_value=0, out=None):
+    # Integer translation by copying the overlapping slices; pixels moved in from outside get border_value.
+    # Gives the same result as cv2.warpAffine with an integer translation, without any interpolation.
+    h, w = image.shape[:2]
+    out_w, out_h = size if size is not None else (w, h)
+    if out is None:
+        out = np.empty((out_h, out_w) + image.shape[2:], dtype=image.dtype)
+
+    # Output rows/columns [top, bottom) x [left, right) come from the input shifted back by (dx, dy)
+    top, bottom = max(0, dy), min(out_h, h + dy)
+    left, right = max(0, dx), min(out_w, w + dx)
+    if top >= bottom or left >= right:
+        out[...] = border_value
+        return out
+
+    out[:top] = border_value
+    out[bottom:] = border_value
+    out[top:bottom, :left] = border_value
+    out[top:bottom, right:] = border_value
+    out[top:bottom, left:right] = image[top - dy:bottom - dy, left - dx:right - dx]
+    return out
+
+
+class AffineTransform:
+    # A chain of translations, rotations and scalings composed into one 3x3 matrix, so the image is resampled once
+    # instead of once per step. Every builder method returns a new transform; steps apply in the order they are
+    # added (AffineTransform().translate(10, 0).rotate(30, center) translates first, then rotates).
+    def __init__(self, matrix=None):
+        self.matrix = np.eye(3) if matrix is None else to_homogeneous(matrix)
+
+    def then(self, matrix):
+        # Append any 2x3 affine or 3x3 perspective matrix (or another AffineTransform) to the chain
+        if isinstance(matrix, AffineTransform):
+            matrix = matrix.matrix
+        return AffineTransform(to_homogeneous(matrix) @ self.matrix)
+
+    def translate(self, tx, ty):
+        return self.then([[1, 0, tx], [0, 1, ty]])
+
+    def rotate(self, angle, center=(0, 0), scale=1.0):
+        # Same convention as cv2.getRotationMatrix2D: positive angles rotate counterclockwise about center
+        return self.then(get_rotation_matrix(center, angle, scale))
+
+    def scale(self, sx, sy=None, center=(0, 0)):
+        sy = sx if sy is None else sy
+        cx, cy = center
+        return self.then([[sx, 0, cx * (1 - sx)], [0, sy, cy * (1 - sy)]])
+
+    def inverse(self):
+        return AffineTransform(np.linalg.inv(self.matrix))
+
+    @property
+    def is_affine(self):
+        return np.allclose(self.matrix[2], [0, 0, 1])
+
+    @property
+    def affine(self):
+        # The 2x3 matrix for cv2.warpAffine
+        if not self.is_affine:
+            raise ValueError("The transform contains a perspective component")
+        return (self.matrix[:2] / self.matrix[2, 2]).astype(np.float32)
+
+    def integer_shift(self):
+        # (dx, dy) if the transform is a pure whole-pixel translation, otherwise None
+        m = self.matrix / self.matrix[2, 2]
+        if not np.allclose(m[:, :2], [[1, 0], [0, 1], [0, 0]], rtol=0, atol=INTEGER_TOLERANCE):
+            return None
+        dx, dy = np.round(m[:2, 2])
+        if abs(m[0, 2] - dx) > INTEGER_TOLERANCE or abs(m[1, 2] - dy) > INTEGER_TOLERANCE:
+            return None
+        return int(dx), int(dy)
+
+    def apply(self, image, size=None, interpolation=cv2.INTER_LINEAR, border_value=0, out=None):
+        # size is the output (width, height), the input size by default
+        if size is None:
+            size = (image.shape[1], image.shape[0])
+
+        shift = self.integer_shift()
+        if shift is not None:
+            return shift_image(image, shift[0], shift[1], size, border_value, out)
+
+        if self.is_affine:
+            return cv2.warpAffine(image, self.affine, size, dst=out, flags=interpolation,
+                                  borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+        return cv2.warpPerspective(image, self.matrix.astype(np.float32), size, dst=out, flags=interpolation,
+                                   borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+
+def benchmark(image, repeats=20):
+    # Step-by-step warps against one composed warp, and a whole-pixel shift against cv2.warpAffine
+    h, w = image.shape[:2]
+    center = (w // 2, h // 2)
+    steps = [AffineTransform().translate(40, -25), AffineTransform().rotate(30, center),
+             AffineTransform().scale(0.8, center=center)]
+    chain = AffineTransform()
+    for step in steps:
+        chain = chain.then(step)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = image
+        for step in steps:
+            result = cv2.warpAffine(result, step.affine, (w, h))
+    chained_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        chain.apply(image)
+    composed_time = (time.perf_counter() - start) / repeats
+
+    shift = AffineTransform().translate(100, -100)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        cv2.warpAffine(image, shift.affine, (w, h))
+    warp_time = (time.perf_counter() - start) / repeats
+
+    output = np.empty_like(image)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        shift.apply(image, out=output)
+    slice_time = (time.perf_counter() - start) / repeats
+
+    print(f"3 separate warps {chained_time * 1000:8.3f} ms   composed {composed_time * 1000:8.3f} ms   "
+          f"{chained_time / composed_time:5.1f}x")
+    identical = np.array_equal(output, cv2.warpAffine(image, shift.affine, (w, h)))
+    print(f"shift warpAffine {warp_time * 1000:8.3f} ms   slice    {slice_time * 1000:8.3f} ms   "
+          f"{warp_time / slice_time:5.1f}x   identical: {identical}")
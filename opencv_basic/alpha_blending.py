@@ -1,35 +1,14 @@
 import cv2
 import numpy as np
 
-# Load the two images to be blended
-foreground = cv2.imread('foreground.jpg')
-background = cv2.imread('background.jpg')
-
-# Resize the images to the same size
-foreground = cv2.resize(foreground, (640, 480))
-background = cv2.resize(background, (640, 480))
-
-# Set the weights for each image (alpha and beta)
-alpha = 0.5
-beta = 1 - alpha
-
-# Set the scalar value added to each pixel after blending (gamma)
-gamma = 0
-
-
-# if alpha and beta are going to be an numpy array
-# def customAddWeighted(src1:np.ndarray, alpha: np.ndarray, src2:np.ndarray, beta: np.ndarray, gamma=0):
-#     # Check if the images have the same size
-#     if src1.shape != src2.shape:
-#         raise ValueError("Input images must have the same size.")
-#
-#     # Perform alpha blending
-#     blended_image = np.clip(src1 * alpha[:, :, np.newaxis] + src2 * beta[:, :, np.newaxis] + gamma, 0, 255).astype(
-#         np.uint8)
-#
-#     return blended_image
-
-def add_weighted(src1, alpha, src2, beta, gamma):
+# Scalar weights are stored as integers scaled by 2 ** FIXED_POINT_SHIFT
+FIXED_POINT_SHIFT = 8
+
+# Rows are blended in chunks of about this many bytes so the integer temporaries stay in cache
+CHUNK_BYTES = 1 << 16
+
+
+def add_weighted_float(src1, alpha, src2, beta, gamma):
     # Check if the input images have the same size and type
     if src1.shape != src2.shape or src1.dtype != src2.dtype:
         raise ValueError("Input images must have the same size and type")
@@ -52,11 +31,135 @@ def add_weighted(src1, alpha, src2, beta, gamma):
     return dst
 
 
-# Blend the two images using the addWeighted function
-blended_img = add_weighted(foreground, alpha, background, beta, gamma)
-# blended_img = cv2.addWeighted(foreground, alpha, background, beta, gamma)
+def check_blend_inputs(src1, src2, out):
+    # Check if the input images have the same size and are 8-bit
+    if src1.shape != src2.shape or src1.dtype != src2.dtype:
+        raise ValueError("Input images must have the same size and type")
+    if src1.dtype != np.uint8:
+        raise ValueError("Fixed-point blending only supports uint8 images")
+
+    if out is None:
+        out = np.empty_like(src1)
+    elif out.shape != src1.shape or out.dtype != np.uint8:
+        raise ValueError("Output buffer must be a uint8 array with the same size as the input images")
+    return out
+
+
+def chunk_rows(image):
+    # Number of rows that fit in one chunk
+    row_bytes = image[0].size * 2
+    return max(1, CHUNK_BYTES // row_bytes)
+
+
+# Fast (no float temporaries)
+# dst = (src1 * a + src2 * b + g) >> 8 where a, b and g are the weights scaled by 256
+def add_weighted(src1, alpha, src2, beta, gamma, out=None):
+    out = check_blend_inputs(src1, src2, out)
+
+    scale = 1 << FIXED_POINT_SHIFT
+    weight1 = int(round(alpha * scale))
+    weight2 = int(round(beta * scale))
+    # Add half of the scale so the final shift rounds to the nearest integer
+    offset = int(round(gamma * scale)) + scale // 2
+
+    # uint16 is enough unless the weights are negative or large enough to overflow it
+    if min(weight1, weight2, offset) >= 0 and 255 * (weight1 + weight2) + offset <= np.iinfo(np.uint16).max:
+        work_dtype = np.uint16
+    else:
+        work_dtype = np.int32
+
+    rows = chunk_rows(src1)
+    scratch1 = np.empty((rows,) + src1.shape[1:], dtype=work_dtype)
+    scratch2 = np.empty_like(scratch1)
+
+    for top in range(0, src1.shape[0], rows):
+        bottom = min(top + rows, src1.shape[0])
+        acc = scratch1[:bottom - top]
+        tmp = scratch2[:bottom - top]
+
+        np.multiply(src1[top:bottom], weight1, out=acc, dtype=work_dtype)
+        np.multiply(src2[top:bottom], weight2, out=tmp, dtype=work_dtype)
+        np.add(acc, tmp, out=acc)
+        np.add(acc, offset, out=acc)
+        np.right_shift(acc, FIXED_POINT_SHIFT, out=acc)
+
+        # Saturate like cv2.addWeighted
+        if work_dtype == np.uint16:
+            np.minimum(acc, 255, out=acc)
+        else:
+            np.clip(acc, 0, 255, out=acc)
+        np.copyto(out[top:bottom], acc, casting='unsafe')
+
+    return out
+
+
+# Per-pixel alpha blending with an 8-bit alpha map (255 = only src1, 0 = only src2)
+# dst = (src1 * alpha + src2 * (255 - alpha)) / 255, rounded to the nearest integer
+def add_weighted_alpha_map(src1, alpha_map, src2, out=None):
+    out = check_blend_inputs(src1, src2, out)
+    if alpha_map.dtype != np.uint8 or alpha_map.shape[:2] != src1.shape[:2]:
+        raise ValueError("Alpha map must be a uint8 array with the same height and width as the input images")
+
+    # A single-channel alpha map is shared by all color channels
+    if src1.ndim == 3 and alpha_map.ndim == 2:
+        alpha_map = alpha_map[:, :, np.newaxis]
+
+    rows = chunk_rows(src1)
+    scratch1 = np.empty((rows,) + src1.shape[1:], dtype=np.uint16)
+    scratch2 = np.empty_like(scratch1)
+    inverse_alpha = np.empty((rows,) + alpha_map.shape[1:], dtype=np.uint8)
+
+    for top in range(0, src1.shape[0], rows):
+        bottom = min(top + rows, src1.shape[0])
+        acc = scratch1[:bottom - top]
+        tmp = scratch2[:bottom - top]
+        alpha = alpha_map[top:bottom]
+        beta = inverse_alpha[:bottom - top]
+
+        np.subtract(255, alpha, out=beta)
+        np.multiply(src1[top:bottom], alpha, out=acc, dtype=np.uint16)
+        np.multiply(src2[top:bottom], beta, out=tmp, dtype=np.uint16)
+        np.add(acc, tmp, out=acc)
+
+        # Exact rounded division by 255: t = x + 128, x / 255 = (t + (t >> 8)) >> 8
+        np.add(acc, 128, out=acc)
+        np.right_shift(acc, 8, out=tmp)
+        np.add(acc, tmp, out=acc)
+        np.right_shift(acc, 8, out=acc)
+        np.copyto(out[top:bottom], acc, casting='unsafe')
+
+    return out
+
+
+if __name__ == '__main__':
+    # Load the two images to be blended
+    foreground = cv2.imread('foreground.jpg')
+    background = cv2.imread('background.jpg')
+
+    # Resize the images to the same size
+    foreground = cv2.resize(foreground, (640, 480))
+    background = cv2.resize(background, (640, 480))
+
+    # Set the weights for each image (alpha and beta)
+    alpha = 0.5
+    beta = 1 - alpha
+
+    # Set the scalar value added to each pixel after blending (gamma)
+    gamma = 0
+
+    # Blend the two images using the addWeighted function
+    # The output buffer can be reused for every frame in a pipeline
+    blended_img = np.empty_like(foreground)
+    add_weighted(foreground, alpha, background, beta, gamma, out=blended_img)
+    # blended_img = add_weighted_float(foreground, alpha, background, beta, gamma)
+    # blended_img = cv2.addWeighted(foreground, alpha, background, beta, gamma)
+
+    # Blend with a per-pixel alpha map: a horizontal gradient from the background to the foreground
+    alpha_map = np.tile(np.linspace(0, 255, foreground.shape[1]).astype(np.uint8), (foreground.shape[0], 1))
+    gradient_img = add_weighted_alpha_map(foreground, alpha_map, background)
 
-# Display the blended image
-cv2.imshow('Blended Image', blended_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+    # Display the blended image
+    cv2.imshow('Blended Image', blended_img)
+    cv2.imshow('Blended Image with Alpha Map', gradient_img)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
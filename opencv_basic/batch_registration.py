@@ -0,0 +1,156 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from image_files import list_images
+
+# Per-image stage timings in seconds
+TIMING_DTYPE = np.dtype([('detect', np.float64), ('match', np.float64), ('ransac', np.float64),
+                         ('warp', np.float64)])
+
+
+class Registrar:
+    # Aligns images to one reference image with ORB features, a brute-force Hamming matcher and a RANSAC
+    # homography (as in registration.py). The reference keypoints and descriptors are computed only once.
+    def __init__(self, reference_img, n_features=500, max_matches=50, ransac_threshold=5.0):
+        self.n_features = n_features
+        self.max_matches = max_matches
+        self.ransac_threshold = ransac_threshold
+        self.reference_size = (reference_img.shape[1], reference_img.shape[0])
+
+        self.orb = cv2.ORB_create(nfeatures=n_features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+
+        keypoints, self.reference_descriptors = self.orb.detectAndCompute(to_gray(reference_img), None)
+        # Plain coordinates instead of cv2.KeyPoint objects, so the reference can be sent to worker processes
+        self.reference_points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+
+    def state(self):
+        return (self.reference_points, self.reference_descriptors, self.reference_size,
+                self.n_features, self.max_matches, self.ransac_threshold)
+
+    @classmethod
+    def from_state(cls, state):
+        registrar = cls.__new__(cls)
+        (registrar.reference_points, registrar.reference_descriptors, registrar.reference_size,
+         registrar.n_features, registrar.max_matches, registrar.ransac_threshold) = state
+        registrar.orb = cv2.ORB_create(nfeatures=registrar.n_features)
+        registrar.matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        return registrar
+
+    def register(self, img, warp=True):
+        # Returns the homography mapping img onto the reference (None if it can't be estimated),
+        # the number of RANSAC inliers, the stage timings and the aligned image (if warp is True)
+        timings = np.zeros((), dtype=TIMING_DTYPE)
+
+        start = time.perf_counter()
+        keypoints, descriptors = self.orb.detectAndCompute(to_gray(img), None)
+        timings['detect'] = time.perf_counter() - start
+
+        if descriptors is None or self.reference_descriptors is None:
+            return None, 0, timings, None
+
+        start = time.perf_counter()
+        matches = self.matcher.match(descriptors, self.reference_descriptors)
+        matches = sorted(matches, key=lambda x: x.distance)[:self.max_matches]
+        timings['match'] = time.perf_counter() - start
+
+        # A homography needs at least four correspondences
+        if len(matches) < 4:
+            return None, 0, timings, None
+
+        start = time.perf_counter()
+        src_pts = np.float32([keypoints[m.queryIdx].pt for m in matches]).reshape(-1, 1, 2)
+        dst_pts = self.reference_points[[m.trainIdx for m in matches]].reshape(-1, 1, 2)
+        M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, self.ransac_threshold)
+        timings['ransac'] = time.perf_counter() - start
+
+        if M is None:
+            return None, 0, timings, None
+        inliers = int(mask.sum())
+
+        aligned = None
+        if warp:
+            start = time.perf_counter()
+            aligned = cv2.warpPerspective(img, M, self.reference_size)
+            timings['warp'] = time.perf_counter() - start
+
+        return M, inliers, timings, aligned
+
+    def register_paths(self, paths, output_dir=None, workers=None):
+        # Register many image files on a process pool. Aligned images are written to output_dir if given.
+        # Images that fail (unreadable, no homography) get a NaN homography and 0 inliers; errors holds the reason
+        # for images that couldn't be read or written ('' otherwise), so one bad file doesn't stop the batch.
+        paths = [str(path) for path in paths]
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+
+        homographies = np.full((len(paths), 3, 3), np.nan)
+        inliers = np.zeros(len(paths), dtype=np.int32)
+        timings = np.zeros(len(paths), dtype=TIMING_DTYPE)
+        errors = [''] * len(paths)
+
+        # The reference features are sent to every worker once, not with every task
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(self.state(),)) as executor:
+            chunk_size = max(1, len(paths) // (4 * (workers or os.cpu_count() or 1)))
+            results = executor.map(register_file, paths, [output_dir] * len(paths), chunksize=chunk_size)
+            for i, (M, count, image_timings, error) in enumerate(results):
+                if M is not None:
+                    homographies[i] = M
+                inliers[i] = count
+                timings[i] = image_timings
+                errors[i] = error
+
+        return {'paths': paths, 'homographies': homographies, 'inliers': inliers, 'timings': timings,
+                'errors': errors}
+
+    def register_directory(self, directory, output_dir=None, workers=None):
+        return self.register_paths(list_images(directory), output_dir, workers)
+
+
+def to_gray(img):
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+# Registrar of the current worker process
+worker_registrar = None
+
+
+def init_worker(state):
+    global worker_registrar
+    worker_registrar = Registrar.from_state(state)
+
+
+def register_file(path, output_dir=None):
+    # Runs in a worker process; failures are returned, not raised, so they don't abort the whole batch
+    img = cv2.imread(path)
+    if img is None:
+        return None, 0, np.zeros((), dtype=TIMING_DTYPE), f"Could not read image: {path}"
+
+    M, inliers, timings, aligned = worker_registrar.register(img, warp=output_dir is not None)
+    if aligned is not None:
+        output_path = os.path.join(output_dir, os.path.basename(path))
+        if not cv2.imwrite(output_path, aligned):
+            return M, inliers, timings, f"Could not write image: {output_path}"
+    return M, inliers, timings, ''
+
+
+def print_timings(timings):
+    # Mean time per image of every stage
+    for stage in TIMING_DTYPE.names:
+        print(f"{stage:<7} {timings[stage].mean() * 1000:8.2f} ms per image")
+
+
+if __name__ == '__main__':
+    # Align every image of a directory to one reference image
+    reference = cv2.imread('HBD.jpg')
+    registrar = Registrar(reference)
+
+    results = registrar.register_directory('frames', output_dir='aligned')  # Replace with your directories
+    print(f"Registered {len(results['paths'])} images, "
+          f"{np.isnan(results['homographies'][:, 0, 0]).sum()} without a homography")
+    print(f"Inliers: min {results['inliers'].min()}, mean {results['inliers'].mean():.1f}")
+    print_timings(results['timings'])
@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from image_files import list_images
+from resizing import resize_image
+
+# The interpolation flags used in resizing.py
+INTERPOLATION_METHODS = {
+    'INTER_NEAREST': cv2.INTER_NEAREST,
+    'INTER_LINEAR': cv2.INTER_LINEAR,
+    'INTER_CUBIC': cv2.INTER_CUBIC,
+    'INTER_AREA': cv2.INTER_AREA,
+    'INTER_LANCZOS4': cv2.INTER_LANCZOS4,
+    'INTER_LINEAR_EXACT': cv2.INTER_LINEAR_EXACT,
+}
+
+
+def resize_file(path, widths, output_dir, interpolation):
+    # Decode once, write one resized copy per width as <name>_<width><ext>.
+    # Returns the files written and an error message ('' on success); failures are returned, not raised, so they
+    # don't abort the whole batch.
+    image = cv2.imread(path)
+    if image is None:
+        return [], f"Could not read image: {path}"
+
+    name, extension = os.path.splitext(os.path.basename(path))
+    written = []
+    for width in widths:
+        output_path = os.path.join(output_dir, f"{name}_{width}{extension}")
+        if not cv2.imwrite(output_path, resize_image(image, width, interpolation)):
+            return written, f"Could not write image: {output_path}"
+        written.append(output_path)
+    return written, ''
+
+
+def resize_batch(source, widths, output_dir, interpolation=cv2.INTER_AREA, workers=None):
+    # Resize every image of a directory or list to each target width on a thread pool.
+    # Each worker holds one decoded image at a time and writes its results as soon as they are ready.
+    # Returns the files written and a list of (path, error) for the images that couldn't be read or written.
+    if isinstance(widths, int):
+        widths = [widths]
+    paths = list_images(source)
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {executor.submit(resize_file, path, widths, output_dir, interpolation): path for path in paths}
+        for future in as_completed(futures):
+            files, error = future.result()
+            written.extend(files)
+            if error:
+                errors.append((futures[future], error))
+    return sorted(written), sorted(errors)
+
+
+def ssim(image1, image2):
+    # Mean structural similarity (Wang et al. 2004: 11x11 Gaussian window with sigma 1.5), averaged over channels
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    x = image1.astype(np.float64)
+    y = image2.astype(np.float64)
+
+    def blur(image):
+        return cv2.GaussianBlur(image, (11, 11), 1.5)
+
+    mu_x = blur(x)
+    mu_y = blur(y)
+    sigma_x = blur(x * x) - mu_x * mu_x
+    sigma_y = blur(y * y) - mu_y * mu_y
+    sigma_xy = blur(x * y) - mu_x * mu_y
+
+    ssim_map = (((2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2))
+                / ((mu_x ** 2 + mu_y ** 2 + c1) * (sigma_x + sigma_y + c2)))
+    return float(ssim_map.mean())
+
+
+def benchmark_interpolations(image, new_width, reference=None, repeats=5, methods=INTERPOLATION_METHODS):
+    # Time every interpolation flag and measure its quality with PSNR and SSIM.
+    # reference is the ideal result at the target size; without one, every result is scaled back to the original
+    # size with INTER_LANCZOS4 and compared with the original image instead.
+    results = []
+    for name, flag in methods.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            resized = resize_image(image, new_width, flag)
+        elapsed = (time.perf_counter() - start) / repeats
+
+        if reference is not None:
+            target, compared = reference, resized
+        else:
+            target = image
+            compared = cv2.resize(resized, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_LANCZOS4)
+
+        results.append({'method': name, 'flag': flag, 'seconds': elapsed,
+                        'psnr': cv2.PSNR(target, compared), 'ssim': ssim(target, compared)})
+
+    results.sort(key=lambda result: result['seconds'])
+    return results
+
+
+def print_benchmark(results):
+    print(f"{'method':<20} {'time (ms)':>10} {'PSNR (dB)':>10} {'SSIM':>8}")
+    for result in results:
+        print(f"{result['method']:<20} {result['seconds'] * 1000:10.3f} {result['psnr']:10.2f} {result['ssim']:8.4f}")
+
+
+def cheapest_method(results, min_psnr=0.0, min_ssim=0.0):
+    # The fastest method that meets the quality bar, or None
+    for result in sorted(results, key=lambda result: result['seconds']):
+        if result['psnr'] >= min_psnr and result['ssim'] >= min_ssim:
+            return result
+    return None
+
+
+if __name__ == '__main__':
+    # Pick the cheapest interpolation that keeps the quality bar, then resize a directory with it
+    image = cv2.imread('HBD.JPG')
+    results = benchmark_interpolations(image, 300)
+    print_benchmark(results)
+
+    choice = cheapest_method(results, min_psnr=30, min_ssim=0.9)
+    if choice is not None:
+        print(f"Cheapest method meeting the bar: {choice['method']}")
+        written, errors = resize_batch('.', [300, 150], 'resized', interpolation=choice['flag'])
+        print(f"Wrote {len(written)} images")
+        for path, error in errors:
+            print(error)
@@ -1,54 +1,142 @@
+import time
+
 import cv2
 
-# Load image
-img = cv2.imread('HBD.jpg')
-
-# Convert to different color spaces
-gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-hsv_img = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-lab_img = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
-ycrcb_img = cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb)
-hls_img = cv2.cvtColor(img, cv2.COLOR_BGR2HLS)
-luv_img = cv2.cvtColor(img, cv2.COLOR_BGR2Luv)
-
-# Split channels for each color space
-gray_channels = cv2.split(gray_img)
-hsv_channels = cv2.split(hsv_img)
-lab_channels = cv2.split(lab_img)
-ycrcb_channels = cv2.split(ycrcb_img)
-hls_channels = cv2.split(hls_img)
-luv_channels = cv2.split(luv_img)
-
-# Display original and color space images
-cv2.imshow("Original Image", img)
-
-cv2.imshow("Grayscale Image", gray_img)
-cv2.imshow("Gray Channel", gray_channels[0])
-
-cv2.imshow("HSV Image", hsv_img)
-cv2.imshow("H Channel", hsv_channels[0])
-cv2.imshow("S Channel", hsv_channels[1])
-cv2.imshow("V Channel", hsv_channels[2])
-
-cv2.imshow("LAB Image", lab_img)
-cv2.imshow("L Channel", lab_channels[0])
-cv2.imshow("A Channel", lab_channels[1])
-cv2.imshow("B Channel", lab_channels[2])
-
-cv2.imshow("YCrCb Image", ycrcb_img)
-cv2.imshow("Y Channel", ycrcb_channels[0])
-cv2.imshow("Cr Channel", ycrcb_channels[1])
-cv2.imshow("Cb Channel", ycrcb_channels[2])
-
-cv2.imshow("HLS Image", hls_img)
-cv2.imshow("H Channel", hls_channels[0])
-cv2.imshow("L Channel", hls_channels[1])
-cv2.imshow("S Channel", hls_channels[2])
-
-cv2.imshow("Luv Image", luv_img)
-cv2.imshow("L Channel", luv_channels[0])
-cv2.imshow("u Channel", luv_channels[1])
-cv2.imshow("v Channel", luv_channels[2])
-
-cv2.waitKey(0)
-cv2.destroyAllWindows()
\ No newline at end of file
+# Conversion code and channel names of every color space
+COLOR_SPACES = {
+    'gray': (cv2.COLOR_BGR2GRAY, ('gray',)),
+    'hsv': (cv2.COLOR_BGR2HSV, ('h', 's', 'v')),
+    'lab': (cv2.COLOR_BGR2LAB, ('l', 'a', 'b')),
+    'ycrcb': (cv2.COLOR_BGR2YCrCb, ('y', 'cr', 'cb')),
+    'hls': (cv2.COLOR_BGR2HLS, ('h', 'l', 's')),
+    'luv': (cv2.COLOR_BGR2Luv, ('l', 'u', 'v')),
+}
+
+
+def read_only(view):
+    # Conversions are cached and shared between consumers, so they get views that can't modify them
+    view = view.view()
+    view.flags.writeable = False
+    return view
+
+
+class ColorSpaces:
+    # Color space conversions of one BGR image, each computed the first time it is accessed and then cached.
+    # Channels are strided views into the converted image instead of cv2.split copies.
+    # buffers maps color space names to caller-provided arrays to convert into; buffers used for one frame are
+    # kept, so set_image() with the next frame of the same size converts without allocating (and overwrites the
+    # arrays handed out for the previous frame).
+    def __init__(self, image, buffers=None):
+        self.buffers = dict(buffers or {})
+        self.image = None
+        self.converted = {}
+        self.set_image(image)
+
+    def set_image(self, image):
+        # Start a new frame: forget the conversions, keep their buffers
+        self.image = image
+        self.converted = {}
+        return self
+
+    def __getitem__(self, space):
+        if space not in COLOR_SPACES:
+            raise KeyError(f"Unknown color space {space!r}, choose one of {sorted(COLOR_SPACES)}")
+        if space not in self.converted:
+            code, _ = COLOR_SPACES[space]
+            self.converted[space] = cv2.cvtColor(self.image, code, dst=self.buffers.get(space))
+            # cvtColor allocates a new array if the buffer doesn't fit; that one is reused from now on
+            self.buffers[space] = self.converted[space]
+        return read_only(self.converted[space])
+
+    def channel(self, space, channel):
+        # One channel by index or name (e.g. channel('hsv', 'v')), as a view
+        names = COLOR_SPACES[space][1]
+        index = names.index(channel) if isinstance(channel, str) else channel
+        converted = self[space]
+        return converted if converted.ndim == 2 else converted[:, :, index]
+
+    def channels(self, space):
+        return tuple(self.channel(space, index) for index in range(len(COLOR_SPACES[space][1])))
+
+    def is_converted(self, space):
+        return space in self.converted
+
+
+def benchmark(image, frames=50):
+    # Eager conversion and splitting of every color space against lazily converting the two that are used
+    start = time.perf_counter()
+    for _ in range(frames):
+        converted = {space: cv2.cvtColor(image, code) for space, (code, _) in COLOR_SPACES.items()}
+        split = {space: cv2.split(converted[space]) for space in converted}
+        value, lightness = split['hsv'][2], split['lab'][0]
+    eager_time = (time.perf_counter() - start) / frames
+
+    spaces = ColorSpaces(image)
+    start = time.perf_counter()
+    for _ in range(frames):
+        spaces.set_image(image)
+        value, lightness = spaces.channel('hsv', 'v'), spaces.channel('lab', 'l')
+    lazy_time = (time.perf_counter() - start) / frames
+
+    print(f"eager (6 spaces + split) {eager_time * 1000:8.3f} ms   lazy (hsv V, lab L) {lazy_time * 1000:8.3f} ms   "
+          f"{eager_time / lazy_time:5.1f}x")
+
+
+if __name__ == '__main__':
+    # Load image
+    img = cv2.imread('HBD.jpg')
+
+    # Convert to different color spaces
+    # (each conversion happens the first time it is used)
+    spaces = ColorSpaces(img)
+    gray_img = spaces['gray']
+    hsv_img = spaces['hsv']
+    lab_img = spaces['lab']
+    ycrcb_img = spaces['ycrcb']
+    hls_img = spaces['hls']
+    luv_img = spaces['luv']
+
+    # Split channels for each color space
+    # (views into the converted images, nothing is copied)
+    gray_channels = spaces.channels('gray')
+    hsv_channels = spaces.channels('hsv')
+    lab_channels = spaces.channels('lab')
+    ycrcb_channels = spaces.channels('ycrcb')
+    hls_channels = spaces.channels('hls')
+    luv_channels = spaces.channels('luv')
+
+    benchmark(img)
+
+    # Display original and color space images
+    cv2.imshow("Original Image", img)
+
+    cv2.imshow("Grayscale Image", gray_img)
+    cv2.imshow("Gray Channel", gray_channels[0])
+
+    cv2.imshow("HSV Image", hsv_img)
+    cv2.imshow("H Channel", hsv_channels[0])
+    cv2.imshow("S Channel", hsv_channels[1])
+    cv2.imshow("V Channel", hsv_channels[2])
+
+    cv2.imshow("LAB Image", lab_img)
+    cv2.imshow("L Channel", lab_channels[0])
+    cv2.imshow("A Channel", lab_channels[1])
+    cv2.imshow("B Channel", lab_channels[2])
+
+    cv2.imshow("YCrCb Image", ycrcb_img)
+    cv2.imshow("Y Channel", ycrcb_channels[0])
+    cv2.imshow("Cr Channel", ycrcb_channels[1])
+    cv2.imshow("Cb Channel", ycrcb_channels[2])
+
+    cv2.imshow("HLS Image", hls_img)
+    cv2.imshow("H Channel", hls_channels[0])
+    cv2.imshow("L Channel", hls_channels[1])
+    cv2.imshow("S Channel", hls_channels[2])
+
+    cv2.imshow("Luv Image", luv_img)
+    cv2.imshow("L Channel", luv_channels[0])
+    cv2.imshow("u Channel", luv_channels[1])
+    cv2.imshow("v Channel", luv_channels[2])
+
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
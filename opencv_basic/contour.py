@@ -1,25 +1,27 @@
 import cv2
 
+from operator_graph import OperatorGraph
+from operators import canny, draw_contours, find_contours, gaussian_blur, grayscale
+
 # Read the image
 image = cv2.imread('HBD.jpg')
 
-# Convert the image to grayscale
-gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-# Apply Gaussian blur to reduce noise
-blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-# Perform edge detection
-edges = cv2.Canny(blurred, 50, 150)
+# The steps are operators in a graph: grayscale -> blur -> Canny -> contours -> drawing.
+# The executor reuses the intermediate buffers from frame to frame and times every node.
+graph = OperatorGraph()
+source = graph.input('image')
 
-# Find contours in the edge map
-contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+# Convert the image to grayscale, apply Gaussian blur to reduce noise and perform edge detection
+edges = graph.pipeline(source, (grayscale, {}), (gaussian_blur, {'ksize': (5, 5), 'sigma': 0}),
+                       (canny, {'low': 50, 'high': 150}))
 
-# Create a copy of the image to draw the contours on
-contour_image = image.copy()
+# Find contours in the edge map and draw them on a copy of the image
+contours = graph.add(find_contours, edges, mode=cv2.RETR_EXTERNAL, method=cv2.CHAIN_APPROX_SIMPLE)
+drawn = graph.add(draw_contours, source, contours, color=(0, 255, 0), thickness=2)
 
-# Draw contours on the image
-cv2.drawContours(contour_image, contours, -1, (0, 255, 0), 2)
+contour_image = graph.run({source: image}, drawn)[drawn]
+graph.print_timings()
+graph.close()
 
 # Display the original and contour images
 cv2.imshow('Original Image', image)
@@ -2,20 +2,22 @@ import cv2
 import matplotlib.pyplot as plt
 import numpy as np
 
+from contrast_scanner import contrast_statistics
+
+# For whole directories, use the scanner: python contrast_scanner.py <directory> results.csv
+
 # Load the image
 img = cv2.imread('HBD.jpg', cv2.IMREAD_GRAYSCALE)
 
 # Calculate the histogram
 hist = cv2.calcHist([img], [0], None, [256], [0, 256])
 
-# Calculate the image mean and standard deviation
-mean, std = cv2.meanStdDev(img)
-
-# Calculate the contrast using the image mean and standard deviation
-contrast = std / mean
+# Calculate the image mean and standard deviation, and the contrast std / mean
+statistics = contrast_statistics(img, threshold=0.5)
+print(f"Mean {statistics['mean']:.1f}, std {statistics['std']:.1f}, contrast {statistics['contrast']:.3f}")
 
 # Check if the contrast is too low
-if contrast < 0.5:
+if statistics['low_contrast']:
     print("Low contrast image detected")
 
 # Display the image and histogram
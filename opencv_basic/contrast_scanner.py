@@ -0,0 +1,135 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from image_files import iter_images
+
+# Images whose std / mean is below this are flagged, as in contrast.py
+LOW_CONTRAST_THRESHOLD = 0.5
+
+# imread flags that let the JPEG decoder produce a 1/2, 1/4 or 1/8 size grayscale image directly
+REDUCED_GRAYSCALE_FLAGS = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+                           4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+
+COLUMNS = ['path', 'width', 'height', 'mean', 'std', 'contrast', 'p5', 'p95', 'low_contrast', 'error']
+
+
+def contrast_statistics(img, threshold=LOW_CONTRAST_THRESHOLD):
+    # Mean, standard deviation, contrast (std / mean) and the 5th/95th percentile intensities of a grayscale image
+    mean, std = cv2.meanStdDev(img)
+    mean, std = float(mean[0, 0]), float(std[0, 0])
+    contrast = std / mean if mean > 0 else 0.0
+
+    cdf = np.cumsum(cv2.calcHist([img], [0], None, [256], [0, 256]).ravel())
+    p5, p95 = np.searchsorted(cdf, [0.05 * cdf[-1], 0.95 * cdf[-1]])
+    return {'mean': mean, 'std': std, 'contrast': contrast, 'p5': int(p5), 'p95': int(p95),
+            'low_contrast': contrast < threshold}
+
+
+def scan_batch(paths, reduction, threshold):
+    # Runs in a worker process. The sizes are those of the reduced image.
+    rows = []
+    for path in paths:
+        row = {'path': path}
+        img = cv2.imread(path, REDUCED_GRAYSCALE_FLAGS[reduction])
+        if img is None:
+            row['error'] = 'unreadable'
+        else:
+            row['height'], row['width'] = img.shape
+            row.update(contrast_statistics(img, threshold))
+        rows.append(row)
+    return rows
+
+
+def batches(paths, size):
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def completed_paths(output_path):
+    # Paths already in the output file. A row cut off by an interruption is removed so the file can be appended to.
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, 'rb+') as file:
+        data = file.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            file.truncate(end)
+
+    with open(output_path, newline='') as file:
+        return {row['path'] for row in csv.DictReader(file)}
+
+
+def scan(root, output_path, reduction=8, threshold=LOW_CONTRAST_THRESHOLD, workers=None, batch_size=64,
+         max_pending=None):
+    # Scan every image under root and append one CSV row per image to output_path as results come in.
+    # Images already in output_path are skipped, so an interrupted scan continues where it stopped.
+    # Returns the number of images scanned and the number flagged as low contrast by this run.
+    if reduction not in REDUCED_GRAYSCALE_FLAGS:
+        raise ValueError(f"reduction must be one of {sorted(REDUCED_GRAYSCALE_FLAGS)}")
+    done = completed_paths(output_path)
+    paths = (path for path in iter_images(root) if path not in done)
+    workers = workers or os.cpu_count()
+    max_pending = max_pending or 4 * workers
+
+    scanned = flagged = 0
+    start = time.perf_counter()
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    with open(output_path, 'a', newline='') as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        if new_file:
+            writer.writeheader()
+
+        def write(rows):
+            nonlocal scanned, flagged
+            writer.writerows(rows)
+            file.flush()
+            scanned += len(rows)
+            flagged += sum(bool(row.get('low_contrast')) for row in rows)
+
+        # At most max_pending batches are queued, so memory stays flat however many files there are
+        pending = deque()
+        for batch in batches(paths, batch_size):
+            pending.append(executor.submit(scan_batch, batch, reduction, threshold))
+            while len(pending) >= max_pending or (pending and pending[0].done()):
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+
+    elapsed = time.perf_counter() - start
+    print(f"Scanned {scanned} images ({len(done)} skipped) in {elapsed:.1f} s "
+          f"({scanned / max(elapsed, 1e-9):.1f} images/s), {flagged} low contrast")
+    return scanned, flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flag low-contrast images in a directory tree")
+    parser.add_argument('root', help="directory to scan recursively")
+    parser.add_argument('output', help="CSV file to write (appended to and resumed if it exists)")
+    parser.add_argument('--reduction', type=int, default=8, choices=sorted(REDUCED_GRAYSCALE_FLAGS),
+                        help="decode at 1/reduction of the full size (default 8)")
+    parser.add_argument('--threshold', type=float, default=LOW_CONTRAST_THRESHOLD,
+                        help="contrast (std / mean) below which an image is flagged (default 0.5)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--batch-size', type=int, default=64, help="images per worker task (default 64)")
+    args = parser.parse_args(argv)
+
+    scan(args.root, args.output, args.reduction, args.threshold, args.workers, args.batch_size)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,21 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Kernels with at least this many taps are convolved in the frequency domain
+FFT_MIN_KERNEL_SIZE = 121
 
+# Relative size of the second singular value below which a kernel is treated as separable
+SEPARABLE_TOLERANCE = 1e-6
 
-def convolution(image, kernel):
+
+# Naive implementation with nested loops (kept as a reference for the faster paths below)
+def convolution_naive(image, kernel):
     image_height, image_width = image.shape[:2]
     kernel_height, kernel_width = kernel.shape[:2]
 
@@ -29,27 +42,274 @@ def convolution(image, kernel):
 
     return output
 
-# Load an image
-image = cv2.imread('HBD.jpg', cv2.IMREAD_GRAYSCALE)
 
-# Define a kernel (3x3 Gaussian blur filter)
-kernel = np.array([[1, 2, 1],
-                   [2, 4, 2],
-                   [1, 2, 1]]) / 16.0
+def pad_image(image, kernel_shape):
+    # Zero-pad exactly like the naive implementation: kernel_size // 2 pixels on every side
+    padding_height = kernel_shape[0] // 2
+    padding_width = kernel_shape[1] // 2
+    return np.pad(image.astype(np.float64, copy=False),
+                  ((padding_height, padding_height), (padding_width, padding_width)))
+
+
+def separate_kernel(kernel):
+    # A kernel is separable when it has rank 1, i.e. it is the outer product of a column and a row vector
+    if kernel.ndim != 2 or min(kernel.shape) == 1:
+        return None
+
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] == 0 or s[1] > SEPARABLE_TOLERANCE * s[0]:
+        return None
+
+    scale = np.sqrt(s[0])
+    column = u[:, 0] * scale
+    row = vt[0] * scale
+    return column, row
+
+
+def convolve_direct(padded_image, kernel, output_shape):
+    # Sliding-window (im2col) view of the padded image; einsum reduces it without copying the windows
+    height, width = output_shape
+    windows = sliding_window_view(padded_image, kernel.shape)[:height, :width]
+    return np.einsum('ijkl,kl->ij', windows, kernel)
+
+
+def convolve_separable(padded_image, column, row, output_shape):
+    # Two 1D passes: kh + kw multiplications per pixel instead of kh * kw
+    height, width = output_shape
+    horizontal = np.einsum('ijk,k->ij', sliding_window_view(padded_image, len(row), axis=1)[:, :width], row)
+    return np.einsum('ijk,k->ij', sliding_window_view(horizontal, len(column), axis=0)[:height], column)
+
+
+def convolve_fft(padded_image, kernel, output_shape):
+    height, width = output_shape
+    kernel_height, kernel_width = kernel.shape
+
+    # Full linear convolution size, rounded up to a size the FFT handles efficiently
+    full_height = padded_image.shape[0] + kernel_height - 1
+    full_width = padded_image.shape[1] + kernel_width - 1
+    fft_shape = (cv2.getOptimalDFTSize(full_height), cv2.getOptimalDFTSize(full_width))
+
+    # Correlation is a convolution with the flipped kernel
+    spectrum = np.fft.rfft2(padded_image, fft_shape) * np.fft.rfft2(kernel[::-1, ::-1], fft_shape)
+    full = np.fft.irfft2(spectrum, fft_shape)
+
+    return full[kernel_height - 1:kernel_height - 1 + height, kernel_width - 1:kernel_width - 1 + width]
+
+
+def convolve_filter2d(padded_image, kernel, output_shape):
+    # With the anchor in the top-left corner filter2D computes the same correlation over the pre-padded image
+    height, width = output_shape
+    result = cv2.filter2D(padded_image, cv2.CV_64F, kernel, anchor=(0, 0), borderType=cv2.BORDER_CONSTANT)
+    return result[:height, :width]
+
+
+def convolve_padded(padded_image, kernel, method, output_shape, vectors=None):
+    if method == 'direct':
+        return convolve_direct(padded_image, kernel, output_shape)
+    elif method == 'separable':
+        if vectors is None:
+            vectors = separate_kernel(kernel)
+        if vectors is None:
+            raise ValueError("Kernel is not separable")
+        return convolve_separable(padded_image, *vectors, output_shape)
+    elif method == 'fft':
+        return convolve_fft(padded_image, kernel, output_shape)
+    elif method == 'filter2D':
+        return convolve_filter2d(padded_image, kernel, output_shape)
+    else:
+        raise ValueError("Invalid method! Please choose 'auto', 'naive', 'direct', 'separable', 'fft' or 'filter2D'.")
+
+
+def choose_method(kernel):
+    if separate_kernel(kernel) is not None:
+        return 'separable'
+    if kernel.size >= FFT_MIN_KERNEL_SIZE:
+        return 'fft'
+    return 'direct'
+
+
+def convolution(image, kernel, method='auto'):
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if kernel.ndim != 2:
+        raise ValueError("Kernel must be a 2D array")
+
+    # Convolve each channel of a color image separately
+    if image.ndim == 3:
+        output = np.empty(image.shape, dtype=np.float32)
+        for channel in range(image.shape[2]):
+            output[:, :, channel] = convolution(image[:, :, channel], kernel, method)
+        return output
+
+    if method == 'auto':
+        method = choose_method(kernel)
+
+    if method == 'naive':
+        return convolution_naive(image, kernel)
+
+    output_shape = image.shape[:2]
+    padded_image = pad_image(image, kernel.shape)
+    result = convolve_padded(padded_image, kernel, method, output_shape)
+
+    # Same output type as the naive implementation
+    return result.astype(np.float32)
+
+
+def fill_tile_buffer(buffer, image, top, left, kernel_shape):
+    # Copy the tile plus its halo into the buffer; only tiles on the image border need zeros
+    image_height, image_width = image.shape[:2]
+    source_top = top - kernel_shape[0] // 2
+    source_left = left - kernel_shape[1] // 2
+    source_bottom = source_top + buffer.shape[0]
+    source_right = source_left + buffer.shape[1]
+
+    inner_top, inner_bottom = max(source_top, 0), min(source_bottom, image_height)
+    inner_left, inner_right = max(source_left, 0), min(source_right, image_width)
+    if (inner_top, inner_bottom, inner_left, inner_right) != (source_top, source_bottom, source_left, source_right):
+        buffer.fill(0)
+
+    buffer[inner_top - source_top:inner_bottom - source_top, inner_left - source_left:inner_right - source_left] = \
+        image[inner_top:inner_bottom, inner_left:inner_right]
+
+
+def convolution_tiled(image, kernel, method='auto', tile_shape=(256, None), workers=None, output=None):
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if kernel.ndim != 2:
+        raise ValueError("Kernel must be a 2D array")
+
+    if method == 'auto':
+        method = choose_method(kernel)
+    if method == 'naive':
+        raise ValueError("The naive method can not be tiled")
+
+    # Direct, separable and filter2D tiles are bit-identical to the untiled result;
+    # FFT tiles use a different transform size, so they only agree up to floating point rounding
+    # Separate the kernel once instead of once per tile
+    vectors = separate_kernel(kernel) if method == 'separable' else None
+    if method == 'separable' and vectors is None:
+        raise ValueError("Kernel is not separable")
+
+    image_height, image_width = image.shape[:2]
+    tile_height = tile_shape[0] or image_height
+    tile_width = tile_shape[1] or image_width
+    kernel_height, kernel_width = kernel.shape
+    halo_height = 2 * (kernel_height // 2)
+    halo_width = 2 * (kernel_width // 2)
+
+    # Every tile is written straight into one preallocated output
+    if output is None:
+        output = np.empty(image.shape, dtype=np.float32)
+    elif output.shape != image.shape or output.dtype != np.float32:
+        raise ValueError("Output must be a float32 array with the same shape as the image")
+
+    # Each worker thread keeps one padded buffer per tile shape (full, right edge, bottom edge, corner),
+    # so the extra memory depends on the tile size and worker count, not on the image size
+    local = threading.local()
+
+    def process_tile(top, left):
+        bottom = min(top + tile_height, image_height)
+        right = min(left + tile_width, image_width)
+        buffer_shape = (bottom - top + halo_height, right - left + halo_width)
+
+        if not hasattr(local, 'buffers'):
+            local.buffers = {}
+        buffer = local.buffers.get(buffer_shape)
+        if buffer is None:
+            buffer = local.buffers[buffer_shape] = np.empty(buffer_shape, dtype=np.float64)
+
+        channels = [None] if image.ndim == 2 else range(image.shape[2])
+        for channel in channels:
+            source = image if channel is None else image[:, :, channel]
+            target = output[top:bottom, left:right] if channel is None else output[top:bottom, left:right, channel]
+            fill_tile_buffer(buffer, source, top, left, kernel.shape)
+            target[...] = convolve_padded(buffer, kernel, method, (bottom - top, right - left), vectors)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(process_tile, top, left)
+                   for top in range(0, image_height, tile_height)
+                   for left in range(0, image_width, tile_width)]
+        for future in futures:
+            future.result()
+
+    return output
+
+
+def benchmark(image, kernels, repeats=3):
+    # Time every convolution path against cv2.filter2D and report the largest deviation from the naive result
+    float_image = image.astype(np.float32)
+    for name, kernel in kernels.items():
+        reference = convolution_naive(image, kernel)
+        print(f"{name} kernel {kernel.shape[0]}x{kernel.shape[1]}")
+
+        for method in ['direct', 'separable', 'fft', 'auto']:
+            if method == 'separable' and separate_kernel(kernel) is None:
+                continue
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = convolution(image, kernel, method)
+            elapsed = (time.perf_counter() - start) / repeats
+            error = np.abs(result - reference).max()
+            print(f"  {method:<10} {elapsed * 1000:9.2f} ms   max error {error:.2e}")
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = cv2.filter2D(float_image, -1, kernel, borderType=cv2.BORDER_CONSTANT)
+        elapsed = (time.perf_counter() - start) / repeats
+        error = np.abs(result - reference).max()
+        print(f"  {'filter2D':<10} {elapsed * 1000:9.2f} ms   max error {error:.2e}")
+
+
+def benchmark_tiled(image, kernel, method='auto', tile_shape=(256, None), worker_counts=(1, 2, 4, 8), repeats=3):
+    # Compare the untiled path with the tiled one for an increasing number of threads
+    untiled_method = 'separable' if method == 'auto' and separate_kernel(kernel) is not None else method
+    start = time.perf_counter()
+    for _ in range(repeats):
+        reference = convolution(image, kernel, untiled_method)
+    baseline = (time.perf_counter() - start) / repeats
+    print(f"untiled    {baseline * 1000:9.2f} ms")
+
+    output = np.empty(image.shape, dtype=np.float32)
+    for workers in worker_counts:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            convolution_tiled(image, kernel, method, tile_shape, workers, output)
+        elapsed = (time.perf_counter() - start) / repeats
+        identical = np.array_equal(output, reference)
+        print(f"{workers:2d} threads {elapsed * 1000:9.2f} ms   speedup {baseline / elapsed:5.2f}x   "
+              f"bit-identical {identical}")
+
+
+if __name__ == '__main__':
+    # Load an image
+    image = cv2.imread('HBD.jpg', cv2.IMREAD_GRAYSCALE)
+
+    # Define a kernel (3x3 Gaussian blur filter)
+    kernel = np.array([[1, 2, 1],
+                       [2, 4, 2],
+                       [1, 2, 1]]) / 16.0
+
+    # Apply the convolution operation
+    # The Gaussian kernel is separable, so the two-pass path is picked automatically
+    output = convolution(image, kernel)
+
+    # Apply the convolution operation using OpenCV's filter2D function
+    output_cv = cv2.filter2D(image, -1, kernel)
 
-# Apply the convolution operation
-output = convolution(image, kernel)
+    # Compare the paths: a separable kernel, a small non-separable one and a large one that goes to the FFT
+    benchmark(image, {
+        'gaussian': kernel,
+        'sharpen': np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float64),
+        'random': np.random.default_rng(0).random((15, 15)),
+    })
 
-# Apply the convolution operation using OpenCV's filter2D function
-# Faster than a naive implementation with nested loops
-output_cv = cv2.filter2D(image, -1, kernel)
+    # Split a larger image into row strips and convolve them on a thread pool
+    benchmark_tiled(np.tile(image, (4, 4)), kernel)
 
-# Convert the output image to 8-bit unsigned integer (grayscale)
-output = np.uint8(output)
+    # Convert the output image to 8-bit unsigned integer (grayscale)
+    output = np.uint8(output)
 
-# Display the original image and the convolved image
-cv2.imshow('Original Image', image)
-cv2.imshow('Convolved Image', output)
-cv2.imshow('Convolved Image with OpenCV', output_cv)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
\ No newline at end of file
+    # Display the original image and the convolved image
+    cv2.imshow('Original Image', image)
+    cv2.imshow('Convolved Image', output)
+    cv2.imshow('Convolved Image with OpenCV', output_cv)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
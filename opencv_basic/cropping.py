@@ -1,4 +1,18 @@
+import hashlib
+import os
+import time
+
 import cv2
+import numpy as np
+
+# imread flags that let the JPEG decoder produce a 1/2, 1/4 or 1/8 size image directly
+REDUCED_COLOR_FLAGS = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                       8: cv2.IMREAD_REDUCED_COLOR_8}
+REDUCED_GRAYSCALE_FLAGS = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+                           4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+
+# Side of the square tiles in the raw tile store
+TILE_SIZE = 256
 
 
 def crop_image(image_path, x, y, width, height):
@@ -11,19 +25,154 @@ def crop_image(image_path, x, y, width, height):
     return cropped_image
 
 
-# Specify the image path
-image_path = "HBD.jpg"
+def read_image(image_path, reduction=1, grayscale=False):
+    # Decode an image at 1/reduction of its size (1, 2, 4 or 8)
+    flags = REDUCED_GRAYSCALE_FLAGS if grayscale else REDUCED_COLOR_FLAGS
+    if reduction not in flags:
+        raise ValueError(f"reduction must be one of {sorted(flags)}")
+    image = cv2.imread(image_path, flags[reduction])
+    if image is None:
+        raise IOError(f"Could not read image: {image_path}")
+    return image
+
+
+def scale_roi(roi, reduction):
+    # Full-resolution (x, y, width, height) to the slices covering it in an image reduced by `reduction`.
+    # The part of the ROI left of or above the image is dropped (a negative start would count from the other end).
+    x, y, width, height = roi
+    return (slice(max(0, y // reduction), max(0, -(-(y + height) // reduction))),
+            slice(max(0, x // reduction), max(0, -(-(x + width) // reduction))))
+
+
+def crop_images(image_path, rois, reduction=1, grayscale=False):
+    # Many crops from one image, which is decoded only once. ROIs are (x, y, width, height) in full-resolution
+    # pixels; with reduction 2, 4 or 8 the image is decoded at reduced size and the crops are downscaled to match.
+    # The crops are views into the decoded image.
+    image = read_image(image_path, reduction, grayscale)
+    return [image[scale_roi(roi, reduction)] for roi in rois]
+
+
+class TileStore:
+    # Decoded images kept on disk as raw pixels in square tiles (a .npy array of shape
+    # (tile rows, tile columns, TILE_SIZE, TILE_SIZE[, channels])), opened memory-mapped.
+    # Every image is decoded once; a crop then reads only the tiles it overlaps.
+    # Files are keyed by path, size, modification time and reduction, so a changed image is decoded again.
+    def __init__(self, directory, tile_size=TILE_SIZE, grayscale=False):
+        self.directory = directory
+        self.tile_size = tile_size
+        self.grayscale = grayscale
+        self.open_tiles = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def tile_path(self, image_path, reduction):
+        stat = os.stat(image_path)
+        key = f"{os.path.abspath(image_path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.tile_size}|{self.grayscale}"
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{digest}_{reduction}.npy")
+
+    def write_tiles(self, image, path):
+        t = self.tile_size
+        h, w = image.shape[:2]
+        rows, cols = -(-h // t), -(-w // t)
+        tiles = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=image.dtype,
+                                          shape=(rows, cols, t, t) + image.shape[2:])
+        for row in range(rows):
+            for col in range(cols):
+                block = image[row * t:(row + 1) * t, col * t:(col + 1) * t]
+                tiles[row, col, :block.shape[0], :block.shape[1]] = block
+                tiles[row, col, block.shape[0]:] = 0
+                tiles[row, col, :, block.shape[1]:] = 0
+        tiles.flush()
+        del tiles
+        # The file only appears under its final name once it is complete
+        os.replace(path + '.tmp', path)
+
+    def tiles(self, image_path, reduction=1):
+        # The memory-mapped tiles and the (height, width) of the image, decoding it on first use
+        path = self.tile_path(image_path, reduction)
+        entry = self.open_tiles.get(path)
+        if entry is None:
+            if os.path.exists(path):
+                # The image size is needed to clip crops at the right and bottom edges
+                with open(path + '.shape') as file:
+                    shape = tuple(int(value) for value in file.read().split())
+            else:
+                image = read_image(image_path, reduction, self.grayscale)
+                shape = image.shape[:2]
+                with open(path + '.shape', 'w') as file:
+                    file.write(f"{shape[0]} {shape[1]}")
+                self.write_tiles(image, path)
+            entry = (np.load(path, mmap_mode='r'), shape)
+            self.open_tiles[path] = entry
+        return entry
+
+    def crop(self, image_path, roi, reduction=1):
+        # Same result as crop_images(image_path, [roi], reduction)[0], as a new array
+        tiles, (h, w) = self.tiles(image_path, reduction)
+        t = self.tile_size
+        rows, cols = scale_roi(roi, reduction)
+        top, bottom = rows.start, min(h, rows.stop)
+        left, right = cols.start, min(w, cols.stop)
+        if top >= bottom or left >= right:
+            return np.empty((max(0, bottom - top), max(0, right - left)) + tiles.shape[4:], dtype=tiles.dtype)
+
+        # Only the tiles overlapping the ROI are read from disk
+        first_row, last_row = top // t, (bottom - 1) // t
+        first_col, last_col = left // t, (right - 1) // t
+        block = tiles[first_row:last_row + 1, first_col:last_col + 1]
+        block = block.swapaxes(1, 2).reshape((block.shape[0] * t, block.shape[1] * t) + tiles.shape[4:])
+        return block[top - first_row * t:bottom - first_row * t, left - first_col * t:right - first_col * t].copy()
+
+    def crops(self, image_path, rois, reduction=1):
+        return [self.crop(image_path, roi, reduction) for roi in rois]
+
+
+def benchmark(image_path, rois, store_directory='tiles'):
+    # One decode per crop (crop_image) against one decode per image, and against the tile store once it is filled
+    start = time.perf_counter()
+    for x, y, width, height in rois:
+        crop_image(image_path, x, y, width, height)
+    per_crop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crop_images(image_path, rois)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    crop_images(image_path, rois, reduction=4)
+    reduced_time = time.perf_counter() - start
+
+    store = TileStore(store_directory)
+    store.tiles(image_path)
+    start = time.perf_counter()
+    store.crops(image_path, rois)
+    store_time = time.perf_counter() - start
+
+    print(f"{len(rois)} crops: crop_image {per_crop_time * 1000:8.2f} ms   crop_images {batch_time * 1000:8.2f} ms   "
+          f"reduced 1/4 {reduced_time * 1000:8.2f} ms   tile store {store_time * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    # Specify the image path
+    image_path = "HBD.jpg"
+
+    # Specify the region of interest for cropping
+    x = 80  # x-coordinate of the top-left corner
+    y = 130  # y-coordinate of the top-left corner
+    width = 280  # Width of the region
+    height = 120  # Height of the region
 
-# Specify the region of interest for cropping
-x = 80  # x-coordinate of the top-left corner
-y = 130  # y-coordinate of the top-left corner
-width = 280  # Width of the region
-height = 120  # Height of the region
+    # Call the crop_image function
+    croped_img = crop_image(image_path, x, y, width, height)
 
-# Call the crop_image function
-croped_img = crop_image(image_path, x, y, width, height)
+    # Many crops decoded from one read of the file, and the same crops at a quarter of the size
+    rois = [(x + dx, y + dy, width // 2, height // 2) for dx in range(0, 120, 20) for dy in range(0, 120, 20)]
+    crops = crop_images(image_path, rois)
+    small_crops = crop_images(image_path, rois, reduction=4)
+    benchmark(image_path, rois)
 
-# Display the cropped image
-cv2.imshow("Cropped Image", croped_img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+    # Display the cropped image
+    cv2.imshow("Cropped Image", croped_img)
+    cv2.imshow("Cropped Image (1/4 decode)", small_crops[0])
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+
+import cv2
+import numpy as np
+
+INDEX_FILE = 'index.json'
+
+# Entries added since index.json was last written, one JSON object per line
+LOG_FILE = 'index.log'
+
+# Rows per shard; the shard files are sparse until they are filled
+SHARD_CAPACITY = 1 << 18
+
+DESCRIPTOR_SIZE = 128
+
+KEYPOINT_DTYPE = np.dtype([
+    ('x', np.float32),
+    ('y', np.float32),
+    ('size', np.float32),
+    ('angle', np.float32),
+    ('response', np.float32),
+    ('octave', np.int32),
+    ('class_id', np.int32),
+])
+
+# Same detector settings as sift.py
+SIFT_PARAMS = {'nfeatures': 0, 'nOctaveLayers': 3, 'contrastThreshold': 0.04, 'edgeThreshold': 10, 'sigma': 1.6}
+
+
+def keypoints_to_array(keypoints):
+    records = np.empty(len(keypoints), dtype=KEYPOINT_DTYPE)
+    for i, kp in enumerate(keypoints):
+        records[i] = (kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave, kp.class_id)
+    return records
+
+
+def array_to_keypoints(records):
+    # Back to cv2.KeyPoint objects, e.g. for cv2.drawKeypoints
+    return [cv2.KeyPoint(float(r['x']), float(r['y']), float(r['size']), float(r['angle']), float(r['response']),
+                         int(r['octave']), int(r['class_id'])) for r in records]
+
+
+class FeatureStore:
+    # Persistent SIFT keypoints and descriptors, keyed by a hash of the image file content and the detector settings.
+    # Features are appended to fixed-capacity memory-mapped .npy shards; index.json records where each image's
+    # rows are. Loading returns views into the memory-mapped shards, so nothing is copied or recomputed.
+    # New entries are appended to index.log once their rows are flushed, so adding an image costs one short write;
+    # close() (or leaving a with block) folds the log into index.json. Only one process should write at a time.
+    def __init__(self, directory, shard_capacity=SHARD_CAPACITY, sift_params=None):
+        self.directory = directory
+        self.shard_capacity = shard_capacity
+        self.sift_params = dict(SIFT_PARAMS if sift_params is None else sift_params)
+        self.params_key = json.dumps(self.sift_params, sort_keys=True).encode()
+        self.sift = None
+        self.stats = {'hits': 0, 'misses': 0}
+        self.shards = {}
+
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as file:
+                self.index = json.load(file)
+        else:
+            self.index = {'shards': [], 'entries': {}}
+        self.replay_log()
+        self.log = open(os.path.join(directory, LOG_FILE), 'a')
+
+    def replay_log(self):
+        # Apply the entries logged after index.json was written. A line cut off by an interruption was never
+        # completed, so it is dropped (its rows are simply overwritten later).
+        log_path = os.path.join(self.directory, LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, 'rb+') as file:
+            data = file.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                file.truncate(end)
+
+        for line in data[:end].splitlines():
+            entry = json.loads(line)
+            shard_id = entry['shard']
+            # Entries of a shard that isn't in index.json yet also create it
+            while len(self.index['shards']) <= shard_id:
+                self.index['shards'].append({'id': len(self.index['shards']), 'used': 0,
+                                             'capacity': entry['capacity']})
+            shard = self.index['shards'][shard_id]
+            shard['used'] = max(shard['used'], entry['start'] + entry['count'])
+            self.index['entries'][entry['key']] = {'shard': shard_id, 'start': entry['start'],
+                                                   'count': entry['count']}
+
+    def content_key(self, path):
+        # Changed files get a new key and are recomputed; so are files processed with other detector settings
+        digest = hashlib.blake2b(self.params_key, digest_size=20)
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def shard_paths(self, shard_id):
+        return (os.path.join(self.directory, f'keypoints_{shard_id:04d}.npy'),
+                os.path.join(self.directory, f'descriptors_{shard_id:04d}.npy'))
+
+    def open_shard(self, shard_id, writable=False):
+        shard = self.shards.get(shard_id)
+        if shard is None or (writable and not shard[2]):
+            keypoints_path, descriptors_path = self.shard_paths(shard_id)
+            mode = 'r+' if writable else 'r'
+            shard = (np.load(keypoints_path, mmap_mode=mode), np.load(descriptors_path, mmap_mode=mode), writable)
+            self.shards[shard_id] = shard
+        return shard
+
+    def new_shard(self, capacity):
+        shard_id = len(self.index['shards'])
+        keypoints_path, descriptors_path = self.shard_paths(shard_id)
+        keypoints = np.lib.format.open_memmap(keypoints_path, mode='w+', dtype=KEYPOINT_DTYPE, shape=(capacity,))
+        descriptors = np.lib.format.open_memmap(descriptors_path, mode='w+', dtype=np.float32,
+                                                shape=(capacity, DESCRIPTOR_SIZE))
+        self.shards[shard_id] = (keypoints, descriptors, True)
+        self.index['shards'].append({'id': shard_id, 'used': 0, 'capacity': capacity})
+        return self.index['shards'][-1]
+
+    def append(self, key, keypoints, descriptors):
+        count = len(keypoints)
+        shard = self.index['shards'][-1] if self.index['shards'] else None
+        if shard is None or shard['used'] + count > shard['capacity']:
+            shard = self.new_shard(max(self.shard_capacity, count))
+
+        start = shard['used']
+        shard_keypoints, shard_descriptors, _ = self.open_shard(shard['id'], writable=True)
+        shard_keypoints[start:start + count] = keypoints
+        shard_descriptors[start:start + count] = descriptors
+        shard_keypoints.flush()
+        shard_descriptors.flush()
+
+        # The entry is only logged once the rows are on disk
+        shard['used'] = start + count
+        self.index['entries'][key] = {'shard': shard['id'], 'start': start, 'count': count}
+        self.log.write(json.dumps({'key': key, 'shard': shard['id'], 'start': start, 'count': count,
+                                   'capacity': shard['capacity']}) + '\n')
+        self.log.flush()
+
+    def save_index(self):
+        # Write the whole index and empty the log. Replaying a log that is already in index.json changes nothing,
+        # so an interruption between the two steps is harmless.
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        temporary_path = index_path + '.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.index, file)
+        os.replace(temporary_path, index_path)
+        self.log.truncate(0)
+        self.log.seek(0)
+
+    def close(self):
+        if not self.log.closed:
+            self.save_index()
+            self.log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load(self, key):
+        entry = self.index['entries'][key]
+        keypoints, descriptors, _ = self.open_shard(entry['shard'])
+        rows = slice(entry['start'], entry['start'] + entry['count'])
+        return keypoints[rows], descriptors[rows]
+
+    def compute(self, path):
+        if self.sift is None:
+            self.sift = cv2.SIFT_create(**self.sift_params)
+        img = cv2.imread(path)
+        if img is None:
+            raise IOError(f"Could not read image: {path}")
+        keypoints, descriptors = self.sift.detectAndCompute(img, None)
+        if descriptors is None:
+            descriptors = np.empty((0, DESCRIPTOR_SIZE), dtype=np.float32)
+        return keypoints_to_array(keypoints), descriptors
+
+    def features(self, path):
+        # Keypoint records and descriptors of an image, computed only if the store doesn't have them yet
+        key = self.content_key(path)
+        if key in self.index['entries']:
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            self.append(key, *self.compute(path))
+        return self.load(key)
+
+    def hit_rate(self):
+        total = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / total if total else 0.0
@@ -1,36 +1,69 @@
+import time
+
 import cv2
+import numpy as np
+
+# Slices that reverse the rows, the columns or both; cv2.flip codes for the copy mode
+FLIP_SLICES = {
+    'horizontal': (slice(None), slice(None, None, -1)),
+    'vertical': (slice(None, None, -1), slice(None)),
+    'both': (slice(None, None, -1), slice(None, None, -1)),
+}
+FLIP_CODES = {'horizontal': 1, 'vertical': 0, 'both': -1}
+
+
+def flip_image(image, direction, copy=True):
+    # copy=True returns a new contiguous array from cv2.flip.
+    # copy=False returns a negative-stride view of image: O(1), nothing allocated, but it shares memory with image
+    # (writes go through to it). Call contiguous() on it when a consumer needs a contiguous array.
+    if direction not in FLIP_CODES:
+        raise ValueError(f"Invalid direction {direction!r}! Please choose 'horizontal', 'vertical', or 'both'.")
+    if copy:
+        return cv2.flip(image, FLIP_CODES[direction])
+    return image[FLIP_SLICES[direction]]
+
+
+def contiguous(image):
+    # A contiguous array; copies only if image is a (flipped) view
+    return np.ascontiguousarray(image)
+
+
+def benchmark(image, repeats=100):
+    for direction in FLIP_CODES:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            flip_image(image, direction)
+        copy_time = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            flip_image(image, direction, copy=False)
+        view_time = (time.perf_counter() - start) / repeats
 
+        print(f"{direction:<10}  copy {copy_time * 1e6:9.1f} us   view {view_time * 1e6:9.1f} us")
 
-def flip_image(image, direction):
-    if direction == 'horizontal':
-        flipped_image = cv2.flip(image, 1)
-    elif direction == 'vertical':
-        flipped_image = cv2.flip(image, 0)
-    elif direction == 'both':
-        flipped_image = cv2.flip(image, -1)
-    else:
-        print("Invalid direction! Please choose 'horizontal', 'vertical', or 'both'.")
-        return None
-    return flipped_image
 
+if __name__ == '__main__':
+    # Load the image
+    image_path = 'HBD.jpg'  # Replace with your image path
+    image = cv2.imread(image_path)
 
-# Load the image
-image_path = 'HBD.jpg'  # Replace with your image path
-image = cv2.imread(image_path)
+    # Flip the image horizontally
+    horizontal_flip = flip_image(image, 'horizontal')
 
-# Flip the image horizontally
-horizontal_flip = flip_image(image, 'horizontal')
+    # Flip the image vertically
+    vertical_flip = flip_image(image, 'vertical')
 
-# Flip the image vertically
-vertical_flip = flip_image(image, 'vertical')
+    # Flip the image both horizontally and vertically
+    both_flip = flip_image(image, 'both')
 
-# Flip the image both horizontally and vertically
-both_flip = flip_image(image, 'both')
+    # Views cost nothing until they are used
+    benchmark(image)
 
-# Display the original and flipped images
-cv2.imshow('Original Image', image)
-cv2.imshow('Horizontal Flip', horizontal_flip)
-cv2.imshow('Vertical Flip', vertical_flip)
-cv2.imshow('Both Flip', both_flip)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+    # Display the original and flipped images
+    cv2.imshow('Original Image', image)
+    cv2.imshow('Horizontal Flip', horizontal_flip)
+    cv2.imshow('Vertical Flip', vertical_flip)
+    cv2.imshow('Both Flip', both_flip)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
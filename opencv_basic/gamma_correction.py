@@ -1,7 +1,8 @@
 import cv2
-import numpy as np
 import matplotlib.pyplot as plt
 
+from point_operations import PointPipeline
+
 # Load the image
 img = cv2.imread('HBD.jpg')
 
@@ -9,10 +10,17 @@ img = cv2.imread('HBD.jpg')
 gamma = 2
 
 # Apply gamma correction using the OpenCV LUT function
-lookUpTable = np.empty((1,256), np.uint8)
-for i in range(256):
-    lookUpTable[0,i] = np.clip(pow(i / 255.0, gamma) * 255.0, 0, 255)
-img_gamma_corrected = cv2.LUT(img, lookUpTable)
+# # Slow
+# # Build the table with a loop on every run
+# lookUpTable = np.empty((1,256), np.uint8)
+# for i in range(256):
+#     lookUpTable[0,i] = np.clip(pow(i / 255.0, gamma) * 255.0, 0, 255)
+# img_gamma_corrected = cv2.LUT(img, lookUpTable)
+
+# Fast
+# The table is built vectorized and cached; more point operations can be chained and are fused into the same LUT,
+# e.g. PointPipeline().gamma(gamma).contrast_stretch(20, 230).invert()
+img_gamma_corrected = PointPipeline().gamma(gamma).apply(img)
 
 # Display the original and gamma-corrected images side by side
 fig, ax = plt.subplots(1, 2)
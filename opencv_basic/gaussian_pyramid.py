@@ -1,12 +1,23 @@
 import cv2
 
+from image_pyramid import ImagePyramid
 
-def generate_gaussian_pyramid(image, levels):
-    pyramid = [image]
-    for i in range(levels - 1):
-        image = cv2.pyrDown(image)
-        pyramid.append(image)
-    return pyramid
+
+def generate_gaussian_pyramid(image, levels, pyramid=None):
+    # # Every level is a separately allocated array
+    # pyramid = [image]
+    # for i in range(levels - 1):
+    #     image = cv2.pyrDown(image)
+    #     pyramid.append(image)
+    # return pyramid
+
+    # All levels are views into one buffer. Pass an ImagePyramid of the same image as pyramid to reuse the levels
+    # it has already computed instead of building new ones.
+    if pyramid is None:
+        pyramid = ImagePyramid(image, levels)
+    elif pyramid.shapes[0] != image.shape or len(pyramid) < levels:
+        raise ValueError("The pyramid must be built from this image with at least the requested levels")
+    return [pyramid.gaussian(level) for level in range(levels)]
 
 
 def display_pyramid(pyramid):
@@ -16,14 +27,17 @@ def display_pyramid(pyramid):
     cv2.destroyAllWindows()
 
 
-# Load the image
-image = cv2.imread('HBD.jpg')
+if __name__ == '__main__':
+    # Load the image
+    image = cv2.imread('HBD.jpg')
 
-# Specify the number of pyramid levels
-levels = 4
+    # Specify the number of pyramid levels
+    levels = 4
 
-# Generate the Gaussian pyramid
-pyramid = generate_gaussian_pyramid(image, levels)
+    # Generate the Gaussian pyramid
+    # (other code working on the same image can be given image_pyramid to reuse its levels)
+    image_pyramid = ImagePyramid(image, levels)
+    pyramid = generate_gaussian_pyramid(image, levels, image_pyramid)
 
-# Display the pyramid
-display_pyramid(pyramid)
+    # Display the pyramid
+    display_pyramid(pyramid)
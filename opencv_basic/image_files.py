@@ -0,0 +1,26 @@
+import os
+
+# File extensions treated as images when listing directories
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+
+def is_image_file(name):
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def list_images(source):
+    # A directory (its image files, sorted), a single path, or a list of paths
+    if isinstance(source, str) and os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source) if is_image_file(name))
+    if isinstance(source, str):
+        return [source]
+    return [str(path) for path in source]
+
+
+def iter_images(root):
+    # Image files under root (recursively), yielded as they are found so millions of paths are never listed at once
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if is_image_file(name):
+                yield os.path.join(directory, name)
@@ -0,0 +1,202 @@
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+def level_shapes(shape, levels):
+    # Shapes produced by repeated cv2.pyrDown: every level rounds the halved size up
+    shapes = [tuple(shape)]
+    for _ in range(levels - 1):
+        h, w = shapes[-1][:2]
+        shapes.append(((h + 1) // 2, (w + 1) // 2) + tuple(shape[2:]))
+    return shapes
+
+
+def laplacian_dtype(dtype):
+    # Residuals of 8-bit images are signed and fit in int16; float images keep their type
+    return np.int16 if dtype == np.uint8 else dtype
+
+
+def read_only(view):
+    # Levels are cached and may be shared, so callers get views that can't modify them
+    view = view.view()
+    view.flags.writeable = False
+    return view
+
+
+def allocate_levels(shapes, dtype):
+    # One contiguous buffer for all levels; every level is a contiguous view into it
+    sizes = [int(np.prod(shape)) for shape in shapes]
+    buffer = np.empty(sum(sizes), dtype=dtype)
+    views = []
+    offset = 0
+    for shape, size in zip(shapes, sizes):
+        views.append(buffer[offset:offset + size].reshape(shape))
+        offset += size
+    return buffer, views
+
+
+class ImagePyramid:
+    # Gaussian and Laplacian pyramids of one image. Levels are computed the first time they are accessed and then
+    # kept; each pyramid lives in a single preallocated buffer and levels are exposed as views into it.
+    # Gaussian level 0 is the image itself, not a copy, so the image must not change while the pyramid is in use.
+    # The Laplacian levels are built from the cached Gaussian levels, so the two never repeat work.
+    # Nothing is cached globally: to share levels between callers, build one ImagePyramid and pass it to them.
+    def __init__(self, image, levels):
+        if levels < 1:
+            raise ValueError("A pyramid needs at least one level")
+        self.levels = levels
+        self.shapes = level_shapes(image.shape, levels)
+        self.dtype = image.dtype
+
+        # Only the reduced levels are allocated
+        self.gaussian_buffer, reduced_views = allocate_levels(self.shapes[1:], image.dtype)
+        self.gaussian_views = [image] + reduced_views
+        self.gaussian_ready = [True] + [False] * (levels - 1)
+
+        # Allocated only if a Laplacian level is requested
+        self.laplacian_buffer = None
+        self.laplacian_views = None
+        self.laplacian_ready = [False] * levels
+
+    def __len__(self):
+        return self.levels
+
+    def nbytes(self):
+        # Memory allocated by the pyramid (level 0 is the caller's image)
+        laplacian_bytes = 0 if self.laplacian_buffer is None else self.laplacian_buffer.nbytes
+        return self.gaussian_buffer.nbytes + laplacian_bytes
+
+    def gaussian(self, level):
+        if not 0 <= level < self.levels:
+            raise IndexError(f"Pyramid level {level} out of range")
+        if not self.gaussian_ready[level]:
+            cv2.pyrDown(self.gaussian(level - 1), dst=self.gaussian_views[level])
+            self.gaussian_ready[level] = True
+        return read_only(self.gaussian_views[level])
+
+    def laplacian(self, level):
+        # Level i holds gaussian(i) - pyrUp(gaussian(i + 1)); the last level is the coarsest Gaussian level
+        if not 0 <= level < self.levels:
+            raise IndexError(f"Pyramid level {level} out of range")
+        if level == self.levels - 1:
+            return self.gaussian(level)
+
+        if not self.laplacian_ready[level]:
+            if self.laplacian_buffer is None:
+                self.laplacian_buffer, self.laplacian_views = allocate_levels(self.shapes[:-1],
+                                                                              laplacian_dtype(self.dtype))
+            fine = self.gaussian(level)
+            expanded = cv2.pyrUp(self.gaussian(level + 1), dstsize=(fine.shape[1], fine.shape[0]))
+            target = self.laplacian_views[level]
+            cv2.subtract(fine, expanded, dst=target, dtype=cv2.CV_16S if target.dtype == np.int16 else -1)
+            self.laplacian_ready[level] = True
+        return read_only(self.laplacian_views[level])
+
+    def gaussian_levels(self):
+        return [self.gaussian(level) for level in range(self.levels)]
+
+    def laplacian_levels(self):
+        return [self.laplacian(level) for level in range(self.levels)]
+
+
+class LaplacianPyramid:
+    # Invertible Laplacian pyramid codec for 8-bit images of one fixed shape.
+    # encode() stores level i as gaussian(i) - pyrUp(gaussian(i + 1)) in int16 (exact, half the size of float32)
+    # plus the coarsest Gaussian level in uint8; decode() adds the levels back up and returns the input exactly.
+    # All buffers are allocated once, so encoding and decoding many frames allocates nothing per frame.
+    def __init__(self, shape, levels):
+        if levels < 1:
+            raise ValueError("A pyramid needs at least one level")
+        self.levels = levels
+        self.shapes = level_shapes(shape, levels)
+
+        # Residuals of levels 0 .. levels - 2 in one int16 buffer
+        self.residual_buffer, self.residuals = allocate_levels(self.shapes[:-1], np.int16)
+        # Gaussian levels (the last one is the stored top level) and the pyrUp results, reused by encode and decode
+        self.gaussian_buffer, self.gaussians = allocate_levels(self.shapes, np.uint8)
+        self.expanded_buffer, self.expanded = allocate_levels(self.shapes[:-1], np.uint8)
+
+    @property
+    def top(self):
+        return self.gaussians[-1]
+
+    def nbytes(self):
+        # Size of the encoded pyramid: the int16 residuals and the uint8 top level
+        return self.residual_buffer.nbytes + self.top.nbytes
+
+    def expand(self, level):
+        # pyrUp of Gaussian level + 1 to the exact size of level
+        h, w = self.shapes[level][:2]
+        return cv2.pyrUp(self.gaussians[level + 1], dst=self.expanded[level], dstsize=(w, h))
+
+    def encode(self, image):
+        if image.shape != self.shapes[0] or image.dtype != np.uint8:
+            raise ValueError(f"Image must be a uint8 array of shape {self.shapes[0]}")
+
+        self.gaussians[0][...] = image
+        for level in range(1, self.levels):
+            cv2.pyrDown(self.gaussians[level - 1], dst=self.gaussians[level])
+        for level in range(self.levels - 1):
+            cv2.subtract(self.gaussians[level], self.expand(level), dst=self.residuals[level], dtype=cv2.CV_16S)
+        return self
+
+    def decode(self, out=None):
+        # Rebuild every Gaussian level from the top down; pyrUp sees exactly the values it saw during encoding,
+        # so the reconstruction is lossless
+        for level in range(self.levels - 2, -1, -1):
+            target = out if level == 0 and out is not None else self.gaussians[level]
+            cv2.add(self.residuals[level], self.expand(level), dst=target, dtype=cv2.CV_8U)
+        if out is None:
+            return self.gaussians[0].copy()
+        if self.levels == 1:
+            out[...] = self.top
+        return out
+
+    def round_trip(self, frames, out=None):
+        # Batch mode: encode and decode every frame with the same buffers, yielding each reconstruction
+        # (the yielded array is overwritten by the next frame)
+        for frame in frames:
+            self.encode(frame)
+            yield self.decode(out if out is not None else self.gaussians[0])
+
+
+def float_laplacian_round_trip(image, levels):
+    # Float32 reference with separately allocated levels, for the benchmark
+    gaussians = [image.astype(np.float32)]
+    for _ in range(levels - 1):
+        gaussians.append(cv2.pyrDown(gaussians[-1]))
+    residuals = [gaussians[i] - cv2.pyrUp(gaussians[i + 1], dstsize=(gaussians[i].shape[1], gaussians[i].shape[0]))
+                 for i in range(levels - 1)]
+    reconstruction = gaussians[-1]
+    for residual in reversed(residuals):
+        reconstruction = cv2.pyrUp(reconstruction, dstsize=(residual.shape[1], residual.shape[0])) + residual
+    return np.clip(np.round(reconstruction), 0, 255).astype(np.uint8)
+
+
+def benchmark_round_trip(image, levels=4, frames=20):
+    # Throughput, peak extra memory and exactness of the int16 codec against a float32 implementation
+    batch = [image] * frames
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    pyramid = LaplacianPyramid(image.shape, levels)
+    output = np.empty_like(image)
+    exact = all(np.array_equal(result, frame) for result, frame in zip(pyramid.round_trip(batch, output), batch))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"int16 codec    {frames / elapsed:8.1f} frames/s   peak {peak / 2 ** 20:7.2f} MiB   "
+          f"encoded {pyramid.nbytes() / 2 ** 20:6.2f} MiB   exact {exact}")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    exact = all(np.array_equal(float_laplacian_round_trip(frame, levels), frame) for frame in batch)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    float_bytes = sum(4 * int(np.prod(shape)) for shape in level_shapes(image.shape, levels))
+    print(f"float32        {frames / elapsed:8.1f} frames/s   peak {peak / 2 ** 20:7.2f} MiB   "
+          f"encoded {float_bytes / 2 ** 20:6.2f} MiB   exact {exact}")
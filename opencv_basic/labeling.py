@@ -0,0 +1,88 @@
+import cv2
+import numpy as np
+
+# One record per connected component, as returned by component_table()
+COMPONENT_DTYPE = np.dtype([
+    ('label', np.int32),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('width', np.int32),
+    ('height', np.int32),
+    ('area', np.int32),
+    ('cx', np.float64),
+    ('cy', np.float64),
+])
+
+
+def component_table(stats, centroids, include_background=False):
+    # Convert the stats and centroids of cv2.connectedComponentsWithStats into one structured array
+    first = 0 if include_background else 1
+    components = np.empty(len(stats) - first, dtype=COMPONENT_DTYPE)
+    components['label'] = np.arange(first, len(stats))
+    components['x'] = stats[first:, cv2.CC_STAT_LEFT]
+    components['y'] = stats[first:, cv2.CC_STAT_TOP]
+    components['width'] = stats[first:, cv2.CC_STAT_WIDTH]
+    components['height'] = stats[first:, cv2.CC_STAT_HEIGHT]
+    components['area'] = stats[first:, cv2.CC_STAT_AREA]
+    components['cx'] = centroids[first:, 0]
+    components['cy'] = centroids[first:, 1]
+    return components
+
+
+def label_components(binary_img, connectivity=8):
+    # Label the foreground of a binary image and return the label image with the table of its components
+    num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary_img, connectivity=connectivity)
+    return labels, component_table(stats, centroids)
+
+
+def random_colors(num_labels, seed=None):
+    # One random color per label, black for the background (label 0)
+    colors = np.random.default_rng(seed).integers(0, 255, size=(num_labels, 3), dtype=np.uint8)
+    colors[0] = 0
+    return colors
+
+
+def colorize(labels, colors=None, out=None):
+    # Color every region with a single indexed gather, O(pixels) whatever the number of labels
+    if colors is None:
+        colors = random_colors(labels.max() + 1)
+    if out is None:
+        out = np.empty(labels.shape + (3,), dtype=np.uint8)
+    return np.take(colors, labels, axis=0, out=out)
+
+
+def filter_components(labels, components, min_area=0, max_area=None, min_size=(0, 0), max_size=None, region=None):
+    # Keep the components whose area and bounding box size are in range and, if region (x, y, width, height) is
+    # given, whose bounding box lies inside it. Kept components are renumbered 1..n in the returned label image.
+    keep = components['area'] >= min_area
+    if max_area is not None:
+        keep &= components['area'] <= max_area
+    keep &= (components['width'] >= min_size[0]) & (components['height'] >= min_size[1])
+    if max_size is not None:
+        keep &= (components['width'] <= max_size[0]) & (components['height'] <= max_size[1])
+    if region is not None:
+        x, y, width, height = region
+        keep &= (components['x'] >= x) & (components['y'] >= y)
+        keep &= (components['x'] + components['width'] <= x + width)
+        keep &= (components['y'] + components['height'] <= y + height)
+
+    kept = components[keep].copy()
+
+    # Old label -> new label lookup table; removed components and the background map to 0
+    relabel = np.zeros(labels.max() + 1 if labels.size else 1, dtype=np.int32)
+    relabel[kept['label']] = np.arange(1, len(kept) + 1, dtype=np.int32)
+    kept['label'] = np.arange(1, len(kept) + 1, dtype=np.int32)
+
+    return relabel[labels], kept
+
+
+def save_components(path, components):
+    # Binary .npy file; np.load(path) returns the structured array again
+    np.save(path, components)
+
+
+def load_components(path):
+    components = np.load(path)
+    if components.dtype != COMPONENT_DTYPE:
+        raise ValueError(f"{path} does not hold a component table")
+    return components
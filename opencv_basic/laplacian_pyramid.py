@@ -1,25 +1,36 @@
 import cv2
+import numpy as np
+
+from image_pyramid import ImagePyramid, LaplacianPyramid, benchmark_round_trip
 
 # Load an image
 img = cv2.imread('HBD.jpg')
 
 # Create a Gaussian pyramid
-G = img.copy()
-gp = [G]
-for i in range(3):
-    G = cv2.pyrDown(G)
-    gp.append(G)
+# Levels are computed on first access and live in one buffer; the Laplacian levels reuse the Gaussian ones
+pyramid = ImagePyramid(img, 4)
+gp = pyramid.gaussian_levels()
 
 # Create a Laplacian pyramid
+# Each level is gp[i] - pyrUp(gp[i + 1]), stored as int16 so negative residuals are not clipped to zero
 lp = [gp[2]]
 for i in range(2, 0, -1):
-    GE = cv2.pyrUp(gp[i])
-    L = cv2.subtract(gp[i-1], GE[:gp[i-1].shape[0], :gp[i-1].shape[1]])
-    lp.append(L)
+    lp.append(pyramid.laplacian(i - 1))
+
+# Encode the image as an invertible Laplacian pyramid and reconstruct it
+codec = LaplacianPyramid(img.shape, 4)
+codec.encode(img)
+reconstructed = codec.decode()
+print("Exact reconstruction:", np.array_equal(reconstructed, img))
+
+# Round-trip throughput and peak memory compared with a float32 pyramid
+benchmark_round_trip(img)
 
-# Display the Laplacian pyramid
+# Display the Laplacian pyramid (residuals as absolute values)
 for i in range(3):
-    cv2.imshow('Laplacian Pyramid Level {}'.format(i), lp[i])
+    cv2.imshow('Laplacian Pyramid Level {}'.format(i), cv2.convertScaleAbs(lp[i]))
     cv2.waitKey(0)
 
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.imshow('Reconstructed Image', reconstructed)
+cv2.waitKey(0)
+cv2.destroyAllWindows()
@@ -0,0 +1,118 @@
+import time
+
+import cv2
+import numpy as np
+
+from image_pyramid import ImagePyramid
+
+# Output rows written between two flushes of the output file
+FLUSH_ROWS = 4096
+
+
+def open_input(source):
+    # Paths to .npy files are opened memory-mapped, so only the tiles being processed are read from disk
+    if isinstance(source, str):
+        return np.load(source, mmap_mode='r')
+    return source
+
+
+def multiband_blend(image1, image2, mask, levels=5):
+    # Laplacian pyramid (multi-band) blending: every frequency band is blended with a correspondingly blurred mask,
+    # so seams are smooth at low frequencies and sharp at high ones.
+    # mask has the height and width of the images; 1 (or 255 for uint8 masks) selects image1, 0 selects image2.
+    if image1.shape != image2.shape or mask.shape[:2] != image1.shape[:2]:
+        raise ValueError("Images and mask must have the same height and width")
+
+    a = np.asarray(image1, dtype=np.float32)
+    b = np.asarray(image2, dtype=np.float32)
+    m = np.asarray(mask, dtype=np.float32)
+    if mask.dtype == np.uint8:
+        m = m / 255.0
+
+    # The Laplacian bands of both images and the Gaussian levels of the mask, each in one buffer
+    pyramid_a = ImagePyramid(a, levels)
+    pyramid_b = ImagePyramid(b, levels)
+    pyramid_m = ImagePyramid(m, levels)
+
+    def weights(level):
+        w = pyramid_m.gaussian(level)
+        return w[:, :, np.newaxis] if a.ndim == 3 and w.ndim == 2 else w
+
+    # Blend the coarsest level, then add the blended Laplacian bands back on the way up
+    w = weights(levels - 1)
+    blend = w * pyramid_a.laplacian(levels - 1) + (1 - w) * pyramid_b.laplacian(levels - 1)
+    for level in range(levels - 2, -1, -1):
+        band_a = pyramid_a.laplacian(level)
+        size = (band_a.shape[1], band_a.shape[0])
+        w = weights(level)
+        blend = cv2.pyrUp(blend, dstsize=size) + w * band_a + (1 - w) * pyramid_b.laplacian(level)
+
+    return blend
+
+
+def to_uint8(image):
+    return np.clip(np.round(image), 0, 255).astype(np.uint8)
+
+
+def blend_tiled(image1, image2, mask, output_path, levels=5, tile_size=1024, halo=None):
+    # Multi-band blending of images too large for memory. The inputs (arrays or .npy paths, opened memory-mapped)
+    # are processed in tiles with an overlapping halo; every tile is blended on its own and only its core is
+    # written to the memory-mapped output .npy file. Peak memory depends on tile_size, halo and levels only.
+    image1 = open_input(image1)
+    image2 = open_input(image2)
+    mask = open_input(mask)
+    if image1.shape != image2.shape or mask.shape[:2] != image1.shape[:2]:
+        raise ValueError("Images and mask must have the same height and width")
+
+    # Tiles start on multiples of the coarsest level's scale so their pyramids line up with the full image's
+    scale = 1 << (levels - 1)
+    tile_size = max(scale, tile_size // scale * scale)
+    if halo is None:
+        # pyrDown/pyrUp use 5x5 kernels: the influence of a pixel spreads by about 2 ** (level + 1) pixels
+        halo = 4 * scale
+    halo = -(-halo // scale) * scale
+
+    height, width = image1.shape[:2]
+    output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.uint8, shape=image1.shape)
+
+    rows_since_flush = 0
+    for top in range(0, height, tile_size):
+        bottom = min(top + tile_size, height)
+        for left in range(0, width, tile_size):
+            right = min(left + tile_size, width)
+
+            # Tile plus halo, clamped to the image
+            read_top, read_bottom = max(0, top - halo), min(height, bottom + halo)
+            read_left, read_right = max(0, left - halo), min(width, right + halo)
+            region = (slice(read_top, read_bottom), slice(read_left, read_right))
+
+            blended = multiband_blend(image1[region], image2[region], mask[region], levels)
+            output[top:bottom, left:right] = to_uint8(
+                blended[top - read_top:bottom - read_top, left - read_left:right - read_left])
+
+        rows_since_flush += bottom - top
+        if rows_since_flush >= FLUSH_ROWS:
+            output.flush()
+            rows_since_flush = 0
+
+    output.flush()
+    return output
+
+
+if __name__ == '__main__':
+    # Blend two images with a diagonal seam through a tiled, memory-mapped pipeline
+    foreground = cv2.resize(cv2.imread('foreground.jpg'), (2048, 1536))
+    background = cv2.resize(cv2.imread('background.jpg'), (2048, 1536))
+    np.save('foreground.npy', foreground)
+    np.save('background.npy', background)
+
+    rows, cols = np.mgrid[0:1536, 0:2048]
+    np.save('mask.npy', np.where(cols > rows * 4 / 3, 255, 0).astype(np.uint8))
+
+    start = time.perf_counter()
+    blended = blend_tiled('foreground.npy', 'background.npy', 'mask.npy', 'blended.npy', levels=5, tile_size=512)
+    print(f"Tiled blend: {time.perf_counter() - start:.2f} s")
+
+    cv2.imshow('Blended Image', cv2.resize(np.asarray(blended), (1024, 768)))
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
@@ -0,0 +1,170 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def param_key(value):
+    # Hashable form of an operator parameter, so identical nodes can be recognized (arrays compare by content)
+    if isinstance(value, np.ndarray):
+        return ('ndarray', value.shape, value.dtype.str, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(param_key(item) for item in value)
+    return value
+
+
+class OperatorGraph:
+    # A DAG of operators (see operators.py) run once per frame.
+    # - add() returns the existing node when the same operator is added with the same inputs and parameters, so
+    #   pipelines built on the same source share their common prefix and it is computed once.
+    # - Nodes whose inputs are ready run concurrently on a thread pool (OpenCV releases the GIL).
+    # - Buffered operators write into recycled arrays: a node's buffer goes back to a pool once all its consumers
+    #   have run, and later stages or later frames take buffers of the right shape and type from that pool.
+    #   Arrays returned by run() belong to the graph and are overwritten by the next run().
+    # - Time spent in every node is accumulated in timings.
+    def __init__(self, workers=None):
+        self.nodes = {}
+        self.keys = {}
+        self.workers = workers or os.cpu_count()
+        self.executor = None
+        self.pool = defaultdict(list)
+        self.signatures = {}
+        self.input_signature = None
+        self.held = []
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def input(self, name):
+        # A source node, fed by run(inputs={name: array})
+        self.nodes.setdefault(name, None)
+        return name
+
+    def add(self, operator, *inputs, name=None, **params):
+        for source in inputs:
+            if source not in self.nodes:
+                raise KeyError(f"Unknown node: {source}")
+        key = (operator, tuple(inputs), param_key(sorted(params.items())))
+        if key in self.keys:
+            return self.keys[key]
+
+        if name is None:
+            name = f"{operator.__name__}_{len(self.nodes)}"
+        if name in self.nodes:
+            raise ValueError(f"Node {name} already exists")
+        self.nodes[name] = (operator, tuple(inputs), params)
+        self.keys[key] = name
+        return name
+
+    def pipeline(self, source, *steps):
+        # A chain of (operator, params) steps starting at source; returns the last node
+        node = source
+        for operator, params in steps:
+            node = self.add(operator, node, **params)
+        return node
+
+    def levels(self, outputs):
+        # Nodes needed for outputs, grouped so every node's inputs are in earlier groups
+        depth = {}
+
+        def visit(name):
+            if name not in depth:
+                node = self.nodes[name]
+                depth[name] = 0 if node is None else 1 + max((visit(source) for source in node[1]), default=-1)
+            return depth[name]
+
+        for name in outputs:
+            visit(name)
+        grouped = defaultdict(list)
+        for name, level in depth.items():
+            if self.nodes[name] is not None:
+                grouped[level].append(name)
+        return [grouped[level] for level in sorted(grouped)]
+
+    def take_buffer(self, name):
+        signature = self.signatures.get(name)
+        if signature is None:
+            return None
+        buffers = self.pool[signature]
+        return buffers.pop() if buffers else np.empty(*signature)
+
+    def release(self, array):
+        self.pool[(array.shape, array.dtype.str)].append(array)
+
+    def run_node(self, name, values, out):
+        operator, inputs, params = self.nodes[name]
+        start = time.perf_counter()
+        if out is not None:
+            result = operator(*(values[source] for source in inputs), out=out, **params)
+        else:
+            result = operator(*(values[source] for source in inputs), **params)
+        return result, time.perf_counter() - start
+
+    def run(self, inputs, outputs):
+        # Compute the output nodes for one frame; returns {name: value}
+        if isinstance(outputs, str):
+            outputs = [outputs]
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        # The outputs of the previous frame are not used by the caller any more
+        for array in self.held:
+            self.release(array)
+        self.held = []
+
+        # Buffer shapes are only known for the input shapes they were recorded with; a frame of another size
+        # starts over (the operators allocate, and the new shapes are recorded)
+        input_signature = {name: (value.shape, value.dtype.str) for name, value in inputs.items()
+                           if isinstance(value, np.ndarray)}
+        if input_signature != self.input_signature:
+            self.signatures = {}
+            self.pool.clear()
+            self.input_signature = input_signature
+
+        levels = self.levels(outputs)
+        consumers = defaultdict(int)
+        for level in levels:
+            for name in level:
+                for source in self.nodes[name][1]:
+                    consumers[source] += 1
+
+        values = dict(inputs)
+        owned = set()
+        for level in levels:
+            outs = {name: self.take_buffer(name) if getattr(self.nodes[name][0], 'buffered', False) else None
+                    for name in level}
+            if len(level) == 1:
+                results = [self.run_node(level[0], values, outs[level[0]])]
+            else:
+                results = list(self.executor.map(lambda name: self.run_node(name, values, outs[name]), level))
+
+            for name, (result, seconds) in zip(level, results):
+                values[name] = result
+                self.timings[name] += seconds
+                self.calls[name] += 1
+                if getattr(self.nodes[name][0], 'buffered', False):
+                    self.signatures[name] = (result.shape, result.dtype.str)
+                    owned.add(name)
+
+            # Buffers of nodes whose consumers have all run can be used by the next stages
+            for name in level:
+                for source in self.nodes[name][1]:
+                    consumers[source] -= 1
+                    if consumers[source] == 0 and source in owned and source not in outputs:
+                        self.release(values[source])
+
+        self.held = [values[name] for name in outputs if name in owned]
+        return {name: values[name] for name in outputs}
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def print_timings(self):
+        total = sum(self.timings.values())
+        print(f"{'node':<28} {'calls':>6} {'ms/call':>9} {'share':>7}")
+        for name in sorted(self.timings, key=lambda name: -self.timings[name]):
+            per_call = self.timings[name] / self.calls[name] * 1000
+            print(f"{name:<28} {self.calls[name]:6d} {per_call:9.3f} {self.timings[name] / total:7.1%}")
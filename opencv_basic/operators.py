@@ -0,0 +1,68 @@
+import cv2
+import numpy as np
+
+from labeling import label_components
+
+
+# Operators are plain functions of their input images and parameters. The ones marked buffered accept out=, an
+# array of the result's shape and type to write into, so OperatorGraph can reuse buffers between stages and frames.
+# An out that doesn't fit the result is ignored and a new array is returned, as cv2 does with dst.
+def buffered(function):
+    function.buffered = True
+    return function
+
+
+def copy_into(image, out):
+    # image copied into out, or into a new array if out is missing or has another shape or type
+    if out is None or out.shape != image.shape or out.dtype != image.dtype:
+        return image.copy()
+    out[...] = image
+    return out
+
+
+@buffered
+def grayscale(image, out=None):
+    if image.ndim == 2:
+        return copy_into(image, out)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=out)
+
+
+@buffered
+def gaussian_blur(image, ksize=(5, 5), sigma=0, out=None):
+    return cv2.GaussianBlur(image, ksize, sigma, dst=out)
+
+
+@buffered
+def canny(image, low=50, high=150, out=None):
+    return cv2.Canny(image, low, high, edges=out)
+
+
+@buffered
+def threshold(image, thresh=127, maxval=255, type=cv2.THRESH_BINARY, out=None):
+    _, result = cv2.threshold(image, thresh, maxval, type, dst=out)
+    return result
+
+
+@buffered
+def morphology(image, op=cv2.MORPH_OPEN, kernel=None, iterations=1, out=None):
+    if kernel is None:
+        kernel = np.ones((3, 3), np.uint8)
+    return cv2.morphologyEx(image, op, kernel, dst=out, iterations=iterations)
+
+
+def find_contours(image, mode=cv2.RETR_EXTERNAL, method=cv2.CHAIN_APPROX_SIMPLE):
+    contours, _ = cv2.findContours(image, mode, method)
+    return contours
+
+
+@buffered
+def draw_contours(image, contours, color=(0, 255, 0), thickness=2, out=None):
+    # Draws on a copy of image (in out when given)
+    out = copy_into(image, out)
+    cv2.drawContours(out, contours, -1, color, thickness)
+    return out
+
+
+def connected_components(image, connectivity=8):
+    # (labels, components) as returned by labeling.label_components
+    return label_components(image, connectivity)
@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+# Number of distinct LUTs (single operations and fused pipelines) kept in memory
+LUT_CACHE_SIZE = 256
+
+LEVELS = np.arange(256, dtype=np.float64)
+
+
+def read_only(lut):
+    # Cached LUTs are shared between callers, so they must not be modified in place
+    lut.setflags(write=False)
+    return lut
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def gamma_lut(gamma):
+    # Same table as gamma_correction.py, built without a Python loop
+    return read_only(np.clip(np.power(LEVELS / 255.0, gamma) * 255.0, 0, 255).astype(np.uint8))
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def contrast_stretch_lut(low, high):
+    # Map [low, high] linearly onto [0, 255] and saturate outside of it
+    if high <= low:
+        raise ValueError("High must be greater than low")
+    return read_only(np.clip(np.round((LEVELS - low) * 255.0 / (high - low)), 0, 255).astype(np.uint8))
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def threshold_lut(thresh, maxval=255, threshold_type=cv2.THRESH_BINARY):
+    # Same result as cv2.threshold on uint8 images for the five basic threshold types
+    levels = np.arange(256)
+    above = levels > thresh
+    maxval = int(np.clip(np.round(maxval), 0, 255))
+    if threshold_type == cv2.THRESH_BINARY:
+        lut = np.where(above, maxval, 0)
+    elif threshold_type == cv2.THRESH_BINARY_INV:
+        lut = np.where(above, 0, maxval)
+    elif threshold_type == cv2.THRESH_TRUNC:
+        lut = np.where(above, int(np.clip(np.floor(thresh), 0, 255)), levels)
+    elif threshold_type == cv2.THRESH_TOZERO:
+        lut = np.where(above, levels, 0)
+    elif threshold_type == cv2.THRESH_TOZERO_INV:
+        lut = np.where(above, 0, levels)
+    else:
+        raise ValueError("Invalid threshold type! Please choose THRESH_BINARY, THRESH_BINARY_INV, THRESH_TRUNC, "
+                         "THRESH_TOZERO or THRESH_TOZERO_INV.")
+    return read_only(lut.astype(np.uint8))
+
+
+@lru_cache(maxsize=1)
+def invert_lut():
+    return read_only(255 - np.arange(256, dtype=np.uint8))
+
+
+OPERATION_LUTS = {
+    'gamma': gamma_lut,
+    'contrast_stretch': contrast_stretch_lut,
+    'threshold': threshold_lut,
+    'invert': invert_lut,
+}
+
+
+@lru_cache(maxsize=LUT_CACHE_SIZE)
+def fused_lut(operations, channels):
+    # Compose the LUTs of all operations into one table per channel: lut = lut_n[...lut_2[lut_1]]
+    luts = np.tile(np.arange(256, dtype=np.uint8), (channels, 1))
+    for name, params, channel in operations:
+        lut = OPERATION_LUTS[name](*params)
+        if channel is None:
+            luts = lut[luts]
+        else:
+            if channel >= channels:
+                raise ValueError(f"Channel {channel} does not exist in a {channels}-channel image")
+            luts[channel] = lut[luts[channel]]
+
+    if channels == 1:
+        return read_only(luts[0])
+    # Shape (1, 256, channels) so cv2.LUT maps each channel with its own table
+    return read_only(np.ascontiguousarray(luts.T[np.newaxis]))
+
+
+class PointPipeline:
+    # A chain of point operations applied as one LUT in a single pass over the image.
+    # Every method returns a new pipeline, so a pipeline can be reused and extended safely:
+    #   pipeline = PointPipeline().gamma(0.8).contrast_stretch(20, 230).invert(channel=2)
+    #   output = pipeline.apply(image)
+    def __init__(self, operations=()):
+        self.operations = tuple(operations)
+
+    def then(self, name, *params, channel=None):
+        if name not in OPERATION_LUTS:
+            raise ValueError(f"Unknown point operation: {name}")
+        return PointPipeline(self.operations + ((name, params, channel),))
+
+    def gamma(self, gamma, channel=None):
+        return self.then('gamma', float(gamma), channel=channel)
+
+    def contrast_stretch(self, low, high, channel=None):
+        return self.then('contrast_stretch', float(low), float(high), channel=channel)
+
+    def threshold(self, thresh, maxval=255, threshold_type=cv2.THRESH_BINARY, channel=None):
+        return self.then('threshold', float(thresh), float(maxval), threshold_type, channel=channel)
+
+    def invert(self, channel=None):
+        return self.then('invert', channel=channel)
+
+    def lut(self, channels=1):
+        return fused_lut(self.operations, channels)
+
+    def apply(self, image, out=None):
+        if image.dtype != np.uint8:
+            raise ValueError("Point operations only support uint8 images")
+        channels = 1 if image.ndim == 2 else image.shape[2]
+
+        # Operations on all channels share one table, which cv2.LUT applies to every channel
+        if all(channel is None for _, _, channel in self.operations):
+            channels = 1
+        return cv2.LUT(image, self.lut(channels), dst=out)
@@ -0,0 +1,155 @@
+import time
+
+import cv2
+import numpy as np
+
+from gaussian_pyramid import generate_gaussian_pyramid
+from image_pyramid import ImagePyramid
+
+# The coarsest level is chosen so the template is still at least this many pixels on its shorter side
+MIN_TEMPLATE_SIZE = 16
+
+# Search radius (in pixels) around each candidate when refining it on the next finer level
+REFINE_RADIUS = 2
+
+# Number of coarse candidates kept per requested match, so a wrong coarse peak can't hide the right one
+CANDIDATES_PER_MATCH = 4
+
+MATCH_DTYPE = np.dtype([('x', np.int32), ('y', np.int32), ('width', np.int32), ('height', np.int32),
+                        ('score', np.float32)])
+
+
+def to_gray(img):
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def pyramid_levels(template_shape, image_shape, min_template_size=MIN_TEMPLATE_SIZE):
+    # Number of pyramid levels such that the template still has min_template_size pixels on the coarsest one
+    levels = 1
+    size = min(template_shape[:2])
+    while size // 2 >= min_template_size and min(image_shape[:2]) >> levels >= size // 2:
+        size //= 2
+        levels += 1
+    return levels
+
+
+def find_peaks(result, count, suppression_size):
+    # The `count` highest scores of a matchTemplate result, at least half a template apart from each other
+    result = result.copy()
+    suppress_w = max(1, suppression_size[0] // 2)
+    suppress_h = max(1, suppression_size[1] // 2)
+    peaks = []
+    for _ in range(count):
+        _, max_val, _, (x, y) = cv2.minMaxLoc(result)
+        if max_val == -np.inf or np.isnan(max_val):
+            break
+        peaks.append((x, y, max_val))
+        result[max(0, y - suppress_h):y + suppress_h + 1, max(0, x - suppress_w):x + suppress_w + 1] = -np.inf
+    return peaks
+
+
+def refine(image, template, x, y, radius, method):
+    # Best match in a small window around (x, y); returns the refined position and its score
+    h, w = template.shape[:2]
+    left = max(0, x - radius)
+    top = max(0, y - radius)
+    right = min(image.shape[1], x + w + radius)
+    bottom = min(image.shape[0], y + h + radius)
+    if right - left < w or bottom - top < h:
+        return x, y, -np.inf
+
+    result = cv2.matchTemplate(image[top:bottom, left:right], template, method)
+    _, max_val, _, (dx, dy) = cv2.minMaxLoc(result)
+    return left + dx, top + dy, max_val
+
+
+def match_templates(image, templates, top_k=1, levels=None, method=cv2.TM_CCOEFF_NORMED,
+                    min_template_size=MIN_TEMPLATE_SIZE, radius=REFINE_RADIUS, image_pyramid=None):
+    # Coarse-to-fine matching: an exhaustive search on a coarse pyramid level, then small-window refinement on every
+    # finer level. Returns one array of MATCH_DTYPE per template, best match first (higher score is better, so
+    # only the correlation methods TM_CCORR_NORMED and TM_CCOEFF_NORMED are supported).
+    # image_pyramid is an optional ImagePyramid of the grayscale image, to reuse its levels across calls.
+    if method not in (cv2.TM_CCORR_NORMED, cv2.TM_CCOEFF_NORMED):
+        raise ValueError("Only TM_CCORR_NORMED and TM_CCOEFF_NORMED are supported")
+    if isinstance(templates, np.ndarray):
+        templates = [templates]
+
+    image = to_gray(image)
+    templates = [to_gray(template) for template in templates]
+    if levels is None:
+        levels = min(pyramid_levels(template.shape, image.shape, min_template_size) for template in templates)
+
+    # The image pyramid is built once and shared by all templates
+    image_pyramid = generate_gaussian_pyramid(image, levels, image_pyramid)
+
+    all_matches = []
+    for template in templates:
+        h, w = template.shape[:2]
+        if h > image.shape[0] or w > image.shape[1]:
+            raise ValueError("Template must not be larger than the image")
+        template_pyramid = generate_gaussian_pyramid(template, levels)
+
+        # Exhaustive search on the coarsest level only
+        coarse = levels - 1
+        result = cv2.matchTemplate(image_pyramid[coarse], template_pyramid[coarse], method)
+        coarse_h, coarse_w = template_pyramid[coarse].shape[:2]
+        candidates = find_peaks(result, top_k * CANDIDATES_PER_MATCH, (coarse_w, coarse_h))
+
+        # Follow every candidate down the pyramid: double its position and search a small window around it
+        refined = []
+        for x, y, score in candidates:
+            for level in range(coarse - 1, -1, -1):
+                x, y, score = refine(image_pyramid[level], template_pyramid[level], 2 * x, 2 * y, radius, method)
+            refined.append((x, y, score))
+
+        # Several candidates can converge on the same spot; keep the best and drop the ones overlapping it
+        refined.sort(key=lambda match: -match[2])
+        matches = []
+        for x, y, score in refined:
+            if score == -np.inf:
+                continue
+            if all(abs(x - mx) > w // 2 or abs(y - my) > h // 2 for mx, my, _, _, _ in matches):
+                matches.append((x, y, w, h, score))
+            if len(matches) == top_k:
+                break
+        all_matches.append(np.array(matches, dtype=MATCH_DTYPE))
+
+    return all_matches
+
+
+def benchmark(image, template, repeats=3, method=cv2.TM_CCOEFF_NORMED):
+    # Exhaustive full-resolution search against the pyramid search
+    image = to_gray(image)
+    template = to_gray(template)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = cv2.matchTemplate(image, template, method)
+        _, exhaustive_score, _, exhaustive_loc = cv2.minMaxLoc(result)
+    exhaustive_time = (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        best = match_templates(image, template, method=method)[0][0]
+    pyramid_time = (time.perf_counter() - start) / repeats
+
+    print(f"exhaustive  {exhaustive_time * 1000:9.2f} ms   best {exhaustive_loc} score {exhaustive_score:.4f}")
+    print(f"pyramid     {pyramid_time * 1000:9.2f} ms   best {(int(best['x']), int(best['y']))} "
+          f"score {best['score']:.4f}")
+    print(f"speedup {exhaustive_time / pyramid_time:.1f}x, "
+          f"same best match: {(int(best['x']), int(best['y'])) == exhaustive_loc}")
+
+
+if __name__ == '__main__':
+    # Cut two templates out of a larger image and look for them
+    image = cv2.imread('Koala.jpg')
+    templates = [image[300:420, 400:560], image[100:180, 700:800]]
+
+    # Both searches reuse one pyramid of the image
+    gray_pyramid = ImagePyramid(to_gray(image), 8)
+    for matches in match_templates(image, templates, top_k=3, image_pyramid=gray_pyramid):
+        print(matches)
+    for matches in match_templates(image, templates[1], top_k=1, image_pyramid=gray_pyramid):
+        print(matches)
+
+    benchmark(image, templates[0])
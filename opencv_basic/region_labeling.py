@@ -1,54 +1,69 @@
 import cv2
 import numpy as np
 
+from labeling import colorize, filter_components, random_colors, save_components
+from operator_graph import OperatorGraph
+from operators import connected_components, morphology, threshold
+
 # Read input image
 image = cv2.imread('HBD.jpg', 0)
 
-# Threshold the image
-ret, thresh = cv2.threshold(image, 92, 255, cv2.THRESH_BINARY_INV)
+# Threshold -> opening -> connected components as operators in a graph
+graph = OperatorGraph()
+source = graph.input('image')
 
-cv2.imshow("Threshold", thresh)
+# Threshold the image
+thresh = graph.add(threshold, source, thresh=92, maxval=255, type=cv2.THRESH_BINARY_INV)
 
 # Define a kernel for opening
 kernel = np.ones((3, 3), np.uint8)
 
 # Apply opening for removing noise and small text
-binary_img = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=1)
-cv2.imshow("Binary Image - opening", binary_img)
+opened = graph.add(morphology, thresh, op=cv2.MORPH_OPEN, kernel=kernel, iterations=1)
 
 # Perform connected component analysis
-num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary_img)
+# labels is the label image, components holds the bounding box, area and centroid of every region
+labeled = graph.add(connected_components, opened)
+
+results = graph.run({source: image}, [thresh, opened, labeled])
+labels, components = results[labeled]
+num_labels = len(components) + 1
+graph.print_timings()
+graph.close()
+
+cv2.imshow("Threshold", results[thresh])
+cv2.imshow("Binary Image - opening", results[opened])
 
-# Print the returned values from connectedComponentsWithStats
+# Print the returned values
 print("Number of labels:", num_labels)
 print("Labels matrix shape:", labels.shape)
-print("Stats matrix shape:", stats.shape)
-print("Centroids matrix shape:", centroids.shape)
+print("Components:", components.shape, components.dtype.names)
 
-# Access and print statistics for each labeled region
-for label in range(1, num_labels):
-    x, y, w, h, area = stats[label]
-    print(f"Label: {label}")
-    print(f" - Bounding box (x, y, w, h): ({x}, {y}, {w}, {h})")
-    print(f" - Area: {area}")
+# Print the statistics of all regions at once
+print(components)
 
-# Create a random color map
-colors = np.random.randint(0, 255, size=(num_labels, 3), dtype=np.uint8)
+# Save the statistics in a binary file (load them back with labeling.load_components)
+save_components('components.npy', components)
 
-# Set background label to black
-colors[0] = [0, 0, 0]
+# Create a random color map (background label is black)
+colors = random_colors(num_labels)
 
-# Create output image
-output = np.zeros((image.shape[0], image.shape[1], 3), dtype=np.uint8)
+# # Slow
+# # Color each region in the output image, scanning the whole label image once per region
+# output = np.zeros((image.shape[0], image.shape[1], 3), dtype=np.uint8)
+# for label in range(1, num_labels):
+#     output[labels == label] = colors[label]
 
+# Fast
+# Color every region in one pass by looking up the color of each pixel's label
+output = colorize(labels, colors)
 
-# Color each region in the output image
-for label in range(1, num_labels):
-    output[labels == label] = colors[label]
-    cv2.imshow('label {} added'.format(label), output)
-    cv2.waitKey(0)
+# Keep only the larger regions, without looping over them
+large_labels, large_components = filter_components(labels, components, min_area=100)
+print(f"{len(large_components)} of {len(components)} regions have an area of at least 100 pixels")
 
 # Display the labeled image
 cv2.imshow('Labeled Image', output)
+cv2.imshow('Large Regions', colorize(large_labels))
 cv2.waitKey(0)
 cv2.destroyAllWindows()
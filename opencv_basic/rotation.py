@@ -1,7 +1,14 @@
-import cv2
 import math
+import time
+from functools import lru_cache
+
+import cv2
 import numpy as np
 
+# Number of (shape, angle, scale) transforms kept in memory. A remap plan holds about 6 bytes per output pixel
+# (50 MB for a 4K frame), so only the transforms of the last couple of streams are kept.
+ROTATION_CACHE_SIZE = 2
+
 
 # Optional(Just to know what is happening behind getRotationMatrix2D function)
 def get_rotation_matrix(center, angle, scale):
@@ -45,23 +52,126 @@ def rotate(image, angle):
     return rotated
 
 
-# Load the image using OpenCV
-image = cv2.imread("HBD.JPG")
-
-# Define the rotation angles
-angles = [30, 60, 90, 120, 150, 180]
+@lru_cache(maxsize=ROTATION_CACHE_SIZE)
+def rotation_plan(shape, angle, scale=1.0, expand=False):
+    # Everything needed to rotate images of this shape, computed once per (shape, angle, scale, expand).
+    # The rotation is about (w // 2, h // 2) like rotate(); expand=True enlarges the output to hold the whole
+    # rotated image. Multiples of 90 degrees that land on whole pixels are a lossless flip/transpose placed at an
+    # integer offset; everything else uses fixed-point cv2.remap grids.
+    h, w = shape[:2]
+    angle = angle % 360
 
-# Loop over the angles and points
-for angle in angles:
-    # Rotate the image clockwise
-    rotated_clockwise = rotate(image, -angle)
-
-    # Rotate the image counterclockwise
-    rotated_counterclockwise = rotate(image, angle)
-
-    # Show the rotated images side by side
-    cv2.imshow(f"Rotated Clockwise {angle} degree", rotated_clockwise)
-    cv2.imshow(f"Rotated Counterclockwise {angle} degree", rotated_counterclockwise)
-    cv2.waitKey(0)
-
-cv2.destroyAllWindows()
+    theta = math.radians(angle)
+    if expand:
+        cos_theta, sin_theta = abs(math.cos(theta)), abs(math.sin(theta))
+        out_w = int(round((w * cos_theta + h * sin_theta) * scale))
+        out_h = int(round((w * sin_theta + h * cos_theta) * scale))
+    else:
+        out_w, out_h = w, h
+
+    # Rotation about the input center, moved to the output center
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, scale)
+    M[0, 2] += (out_w - w) / 2
+    M[1, 2] += (out_h - h) / 2
+
+    if scale == 1 and angle % 90 == 0 and np.allclose(M, np.round(M), rtol=0, atol=1e-9):
+        # The input pixel that cv2.flip/cv2.rotate puts at the top-left corner, and where M sends it
+        M = np.round(M)
+        code, corner = {0: (None, (0, 0)), 90: (cv2.ROTATE_90_COUNTERCLOCKWISE, (w - 1, 0)),
+                        180: (-1, (w - 1, h - 1)), 270: (cv2.ROTATE_90_CLOCKWISE, (0, h - 1))}[angle]
+        dx, dy = (int(v) for v in M @ (corner[0], corner[1], 1))
+        return ('flip' if angle in (0, 180) else 'transpose'), (code, dx, dy), (out_w, out_h)
+
+    # For every output pixel, the input coordinates it samples (the inverse transform)
+    inverse = cv2.invertAffineTransform(M)
+    xs, ys = np.meshgrid(np.arange(out_w, dtype=np.float32), np.arange(out_h, dtype=np.float32))
+    map_x = inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]
+    map_y = inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]
+
+    # Fixed-point maps are smaller and faster to apply than two float32 maps
+    map1, map2 = cv2.convertMaps(map_x.astype(np.float32), map_y.astype(np.float32), cv2.CV_16SC2)
+    map1.setflags(write=False)
+    map2.setflags(write=False)
+    return 'remap', (map1, map2), (out_w, out_h)
+
+
+def rotate_cached(image, angle, scale=1.0, expand=False, interpolation=cv2.INTER_LINEAR, out=None):
+    # rotate(image, angle) for the default arguments: identical for multiples of 90 degrees, otherwise up to the
+    # 1/32 pixel rounding of the fixed-point grids. Same-size video frames rotated by a fixed angle reuse the
+    # cached plan, so only the resampling is left per frame.
+    kind, data, (out_w, out_h) = rotation_plan(image.shape[:2], angle, scale, expand)
+
+    if kind == 'remap':
+        map1, map2 = data
+        return cv2.remap(image, map1, map2, interpolation, dst=out, borderMode=cv2.BORDER_CONSTANT)
+
+    code, dx, dy = data
+    if code is None:
+        rotated = image
+    elif kind == 'flip':
+        rotated = cv2.flip(image, code)
+    else:
+        rotated = cv2.rotate(image, code)
+    rot_h, rot_w = rotated.shape[:2]
+    if (dx, dy) == (0, 0) and (rot_h, rot_w) == (out_h, out_w):
+        if out is None:
+            return rotated if rotated is not image else image.copy()
+        out[...] = rotated
+        return out
+
+    # Place the rotated image at (dx, dy) in the output canvas; what falls outside is cropped, the rest is zero
+    if out is None:
+        out = np.zeros((out_h, out_w) + image.shape[2:], dtype=image.dtype)
+    else:
+        out[...] = 0
+    x0, y0 = max(dx, 0), max(dy, 0)
+    x1, y1 = min(dx + rot_w, out_w), min(dy + rot_h, out_h)
+    if x0 < x1 and y0 < y1:
+        out[y0:y1, x0:x1] = rotated[y0 - dy:y1 - dy, x0 - dx:x1 - dx]
+    return out
+
+
+def benchmark(image, angles, frames=50):
+    # Rotating many frames of the same size: rotate() rebuilds the matrix and warps, rotate_cached() reuses the plan
+    output = np.empty_like(image)
+    for angle in angles:
+        start = time.perf_counter()
+        for _ in range(frames):
+            rotate(image, angle)
+        warp_time = (time.perf_counter() - start) / frames
+
+        rotate_cached(image, angle, out=output)
+        start = time.perf_counter()
+        for _ in range(frames):
+            rotate_cached(image, angle, out=output)
+        cached_time = (time.perf_counter() - start) / frames
+
+        kind = rotation_plan(image.shape[:2], angle)[0]
+        print(f"{angle:4d} degree  rotate {warp_time * 1000:7.3f} ms   rotate_cached ({kind:<9}) "
+              f"{cached_time * 1000:7.3f} ms   {warp_time / cached_time:5.1f}x")
+
+
+if __name__ == '__main__':
+    # Load the image using OpenCV
+    image = cv2.imread("HBD.JPG")
+
+    # Define the rotation angles
+    angles = [30, 60, 90, 120, 150, 180]
+
+    # Compare with the cached version on repeated frames of the same size
+    benchmark(image, angles)
+
+    # Loop over the angles and points
+    for angle in angles:
+        # Rotate the image clockwise
+        rotated_clockwise = rotate(image, -angle)
+
+        # Rotate the image counterclockwise
+        rotated_counterclockwise = rotate(image, angle)
+
+        # Show the rotated images side by side
+        cv2.imshow(f"Rotated Clockwise {angle} degree", rotated_clockwise)
+        cv2.imshow(f"Rotated Counterclockwise {angle} degree", rotated_counterclockwise)
+        cv2.waitKey(0)
+
+    cv2.destroyAllWindows()
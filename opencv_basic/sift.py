@@ -1,13 +1,23 @@
 import cv2
 
+from feature_store import FeatureStore, array_to_keypoints
+
 # Load the input image
-img = cv2.imread('HBD.jpg')
+image_path = 'HBD.jpg'
+img = cv2.imread(image_path)
 
 # Initialize the SIFT detector
-sift = cv2.SIFT_create(nfeatures=0, nOctaveLayers=3, contrastThreshold=0.04, edgeThreshold=10, sigma=1.6)
+# sift = cv2.SIFT_create(nfeatures=0, nOctaveLayers=3, contrastThreshold=0.04, edgeThreshold=10, sigma=1.6)
 
 # Detect keypoints and compute descriptors
-keypoints, descriptors = sift.detectAndCompute(img, None)
+# keypoints, descriptors = sift.detectAndCompute(img, None)
+
+# The feature store runs the same SIFT detector, but only the first time it sees this image (or after it changes);
+# later runs load the keypoints and descriptors from the memory-mapped store
+with FeatureStore('sift_features') as store:
+    keypoint_records, descriptors = store.features(image_path)
+    keypoints = array_to_keypoints(keypoint_records)
+print(f"{len(keypoints)} keypoints, descriptors {descriptors.shape}, store hits/misses: {store.stats}")
 
 # Draw keypoints on the input image
 img_with_keypoints = cv2.drawKeypoints(img, keypoints, None)
@@ -15,4 +25,4 @@ img_with_keypoints = cv2.drawKeypoints(img, keypoints, None)
 # Display the input image with keypoints
 cv2.imshow('Input image with keypoints', img_with_keypoints)
 cv2.waitKey(0)
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.destroyAllWindows()
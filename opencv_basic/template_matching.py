@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
 
+from pyramid_template_matching import match_templates
+
 # Load the main image and the template image
 main_image = cv2.imread('foreground.jpg')
 template = cv2.imread('background.jpg')
@@ -14,11 +16,16 @@ template_gray = np.uint8(template_gray)
 main_image = np.uint8(main_image)
 
 # Perform template matching
-result = cv2.matchTemplate(main_image, template_gray, cv2.TM_CCOEFF_NORMED)
+# Exhaustive search at full resolution (cost grows with image area times template area)
+# result = cv2.matchTemplate(main_image, template_gray, cv2.TM_CCOEFF_NORMED)
+# min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+# top_left = max_loc
+
+# Coarse-to-fine search: exhaustive on a small pyramid level, then refined in small windows on the finer levels
+best = match_templates(main_image, template_gray, top_k=1, method=cv2.TM_CCOEFF_NORMED)[0][0]
 
 # Find the location of the best match
-min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-top_left = max_loc
+top_left = (int(best['x']), int(best['y']))
 bottom_right = (top_left[0] + template.shape[1], top_left[1] + template.shape[0])
 
 # Draw a rectangle around the best match
@@ -0,0 +1,20 @@
+import cv2
+import numpy as np
+
+from cropping import TileStore, crop_images
+
+
+def test_tile_store_matches_crop_images_at_the_edges(tmp_path):
+    rng = np.random.default_rng(0)
+    image_path = str(tmp_path / 'image.png')
+    cv2.imwrite(image_path, rng.integers(0, 256, (70, 90, 3), dtype=np.uint8))
+    store = TileStore(str(tmp_path / 'tiles'), tile_size=32)
+
+    # Inside, across the edges, partly and fully outside on every side
+    rois = [(10, 5, 30, 20), (-10, 5, 20, 20), (5, -10, 20, 20), (-10, -10, 200, 200), (80, 60, 20, 20),
+            (-30, 5, 10, 20), (5, -30, 20, 10), (100, 5, 10, 10), (5, 80, 10, 10), (89, 69, 1, 1)]
+    for roi in rois:
+        expected = crop_images(image_path, [roi])[0]
+        assert store.crop(image_path, roi).shape == expected.shape, roi
+        assert np.array_equal(store.crop(image_path, roi), expected), roi
+    assert crop_images(image_path, [(-10, 5, 20, 20)])[0].shape == (20, 10, 3)
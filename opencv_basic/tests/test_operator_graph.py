@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+
+from operator_graph import OperatorGraph
+from operators import canny, draw_contours, find_contours, gaussian_blur, grayscale
+
+
+def reference_contours(image):
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    drawn = image.copy()
+    cv2.drawContours(drawn, contours, -1, (0, 255, 0), 2)
+    return edges, drawn
+
+
+def test_frames_of_different_sizes():
+    rng = np.random.default_rng(0)
+    graph = OperatorGraph(workers=2)
+    source = graph.input('image')
+    edges = graph.pipeline(source, (grayscale, {}), (gaussian_blur, {'ksize': (5, 5), 'sigma': 0}),
+                           (canny, {'low': 50, 'high': 150}))
+    drawn = graph.add(draw_contours, source, graph.add(find_contours, edges))
+
+    # Color and grayscale frames of two sizes, alternating so the buffers of one size meet frames of the other
+    frames = [rng.integers(0, 256, shape, dtype=np.uint8)
+              for shape in [(551, 448, 3), (768, 1024, 3), (551, 448, 3), (60, 80), (768, 1024), (60, 80)]]
+    for frame in frames:
+        results = graph.run({source: frame}, [edges, drawn])
+        expected_edges, expected_drawn = reference_contours(frame)
+        assert np.array_equal(results[edges], expected_edges)
+        assert np.array_equal(results[drawn], expected_drawn)
+    graph.close()
+
+
+def test_grayscale_and_draw_contours_ignore_unfitting_out():
+    image = np.full((20, 30), 7, dtype=np.uint8)
+    out = np.empty((10, 10), dtype=np.uint8)
+    assert np.array_equal(grayscale(image, out=out), image)
+    assert draw_contours(image, [], out=out).shape == image.shape
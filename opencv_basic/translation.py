@@ -2,6 +2,8 @@ import argparse
 import cv2
 import numpy as np
 
+from affine_transform import AffineTransform, benchmark
+
 
 # Load the input image using the file path argument
 img = cv2.imread("HBD.JPG")
@@ -19,17 +21,27 @@ M2 = np.float32([[1, 0, -100], [0, 1, 100]])
 
 # Apply the translation matrix to the image
 # Move the image up and right
-img_translated1 = cv2.warpAffine(img, M1, (cols, rows))
+# (whole-pixel translations are copied slice by slice, without interpolation)
+img_translated1 = AffineTransform(M1).apply(img, (cols, rows))
 
 # Apply the translation matrix to the image
 # Move the image down and left
-img_translated2 = cv2.warpAffine(img, M2, (cols, rows))
+img_translated2 = AffineTransform(M2).apply(img, (cols, rows))
+
+# Chain a translation, a rotation and a scaling; the image is resampled only once
+center = (cols // 2, rows // 2)
+transform = AffineTransform().translate(50, 25).rotate(30, center).scale(0.8, center=center)
+img_transformed = transform.apply(img, (cols, rows))
+
+# Compare against applying every step with its own cv2.warpAffine
+benchmark(img)
 
 # Display the original and translated images
 cv2.imshow('Original Image', img)
 cv2.imshow('Translated Image 1', img_translated1)
 cv2.imshow('Translated Image 2', img_translated2)
+cv2.imshow('Translated, Rotated and Scaled Image', img_transformed)
 
 # Wait for a key press and then exit
 cv2.waitKey(0)
-cv2.destroyAllWindows()
\ No newline at end of file
+cv2.destroyAllWindows()
@@ -0,0 +1,199 @@
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from alpha_blending import add_weighted, add_weighted_alpha_map
+
+
+def read_frames(path):
+    # Decode a video file frame by frame, reusing a single frame buffer
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video file: {path}")
+
+    frame = None
+    try:
+        while True:
+            ok, frame = capture.read(frame)
+            if not ok:
+                break
+            # The yielded frame is overwritten by the next read, so consumers must copy it if they keep it
+            yield frame
+    finally:
+        capture.release()
+
+
+def linear_fade(start, length, reverse=False):
+    # Crossfade: alpha goes from 0 to 1 over `length` frames starting at frame `start`
+    def alpha(index):
+        value = min(max((index - start) / length, 0.0), 1.0)
+        return 1.0 - value if reverse else value
+
+    return alpha
+
+
+def video_properties(path):
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video file: {path}")
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    capture.release()
+    return (width, height), fps
+
+
+def composite_video(overlay, background_path, output_path, alpha=0.5, size=None, queue_size=8, fourcc='mp4v'):
+    # overlay: a video path, a still image path or an already loaded image
+    # alpha: a float, a uint8 alpha map of the output size, or a function of the frame index (see linear_fade)
+    background_size, fps = video_properties(background_path)
+    width, height = size or background_size
+
+    # Still overlays are resized once; video overlays are decoded next to the background
+    overlay_frames = None
+    still_overlay = None
+    if isinstance(overlay, np.ndarray):
+        still_overlay = cv2.resize(overlay, (width, height))
+    elif cv2.haveImageReader(overlay):
+        still_overlay = cv2.resize(cv2.imread(overlay), (width, height))
+    else:
+        overlay_frames = read_frames(overlay)
+    background_frames = read_frames(background_path)
+
+    # Every frame in flight owns one set of preallocated buffers; the sets are recycled through `free`
+    free = queue.Queue()
+    for _ in range(2 * queue_size + 3):
+        free.put({
+            'overlay': np.empty((height, width, 3), dtype=np.uint8),
+            'background': np.empty((height, width, 3), dtype=np.uint8),
+            'blended': np.empty((height, width, 3), dtype=np.uint8),
+        })
+    decoded = queue.Queue(maxsize=queue_size)
+    blended = queue.Queue(maxsize=queue_size)
+
+    stop = threading.Event()
+    errors = []
+    stage_seconds = {'decode': 0.0, 'blend': 0.0, 'encode': 0.0}
+
+    def put(target, item):
+        # Give up waiting on a full queue once another stage has failed
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(source):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def decode():
+        try:
+            index = 0
+            while True:
+                buffers = get(free)
+                if buffers is None:
+                    break
+
+                start = time.perf_counter()
+                background = next(background_frames, None)
+                overlay_frame = None if overlay_frames is None else next(overlay_frames, None)
+                if background is None or (overlay_frames is not None and overlay_frame is None):
+                    break
+
+                cv2.resize(background, (width, height), dst=buffers['background'])
+                if overlay_frame is not None:
+                    cv2.resize(overlay_frame, (width, height), dst=buffers['overlay'])
+                stage_seconds['decode'] += time.perf_counter() - start
+
+                put(decoded, (index, buffers))
+                index += 1
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+        finally:
+            # Release the captures even when the pipeline stops early
+            background_frames.close()
+            if overlay_frames is not None:
+                overlay_frames.close()
+            put(decoded, None)
+
+    def blend():
+        try:
+            while True:
+                item = get(decoded)
+                if item is None:
+                    break
+                index, buffers = item
+                overlay_frame = buffers['overlay'] if still_overlay is None else still_overlay
+
+                start = time.perf_counter()
+                frame_alpha = alpha(index) if callable(alpha) else alpha
+                if isinstance(frame_alpha, np.ndarray):
+                    add_weighted_alpha_map(overlay_frame, frame_alpha, buffers['background'], out=buffers['blended'])
+                else:
+                    add_weighted(overlay_frame, frame_alpha, buffers['background'], 1 - frame_alpha, 0,
+                                 out=buffers['blended'])
+                stage_seconds['blend'] += time.perf_counter() - start
+                put(blended, buffers)
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+        finally:
+            put(blended, None)
+
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"Could not open video writer: {output_path}")
+
+    threads = [threading.Thread(target=decode, daemon=True), threading.Thread(target=blend, daemon=True)]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # Encode on the calling thread and hand the buffers back to the decoder
+    frames = 0
+    try:
+        while True:
+            buffers = get(blended)
+            if buffers is None:
+                break
+            start = time.perf_counter()
+            writer.write(buffers['blended'])
+            stage_seconds['encode'] += time.perf_counter() - start
+            free.put(buffers)
+            frames += 1
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        writer.release()
+
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed > 0 else 0.0,
+        'stage_seconds': stage_seconds,
+    }
+
+
+if __name__ == '__main__':
+    # Overlay the foreground image onto a video and fade it in over the first 60 frames
+    video_path = 'input.mp4'  # Replace with your video path
+    stats = composite_video('foreground.jpg', video_path, 'composited.mp4', alpha=linear_fade(0, 60), size=(640, 480))
+
+    print(f"{stats['frames']} frames in {stats['seconds']:.2f} s ({stats['fps']:.1f} fps)")
+    for stage, seconds in stats['stage_seconds'].items():
+        print(f"  {stage:<7} {seconds:.2f} s")